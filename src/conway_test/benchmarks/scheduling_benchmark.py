@@ -0,0 +1,241 @@
+import argparse
+import asyncio
+import contextlib
+import datetime
+import gc
+import io
+import json
+import os                                                                           as _os
+import subprocess
+import sys                                                                          as _sys
+import time
+import tracemalloc
+
+import conway
+
+from conway.application.application                                                 import Application
+from conway.async_utils.scheduling_context                                          import SchedulingContext
+from conway.async_utils.ushering_to                                                 import UsheringTo
+from conway.observability.logger                                                    import Logger
+
+from conway_test.util.conway_test_utils                                             import ConwayTestUtils
+
+
+class SchedulingBenchmark():
+
+    '''
+    Benchmark for the asynchronous orchestration machinery used by test cases like
+    :class:`RepoManipulationTestCase`, which fan out one coroutine per repo through a :class:`UsheringTo`, each with
+    a child :class:`SchedulingContext`, and rely on the schedule-based logger to sort the logs by that scheduling tree.
+
+    For each "shape" of work, given by a fan-out and a depth, the benchmark builds a tree of synthetic coroutines: each
+    coroutine at a depth less than the maximal depth ushers `fan_out` children, each with its own child
+    :class:`SchedulingContext`, and leaves just yield to the event loop once. So a shape with fan-out `F` and depth
+    `D` runs `F + F^2 + ... + F^D` coroutines.
+
+    For each shape it measures:
+
+    * Seconds per coroutine when ushered through :class:`UsheringTo`, and for the same tree run with plain
+      :func:`asyncio.gather` and no scheduling contexts. The difference is the overhead of the scheduling machinery.
+    * The same, but with every coroutine logging a line through the schedule-based logger, plus the seconds
+      per line it takes to flush (and hence sort) the buffered log lines. Lines are flushed to an in-memory stream
+      only, so that the figure doesn't include the cost of writing them to the terminal or a log file.
+    * Bytes of memory allocated per :class:`SchedulingContext`.
+
+    Results are appended as one JSON line per run to a results file, together with the GIT commits of this
+    repo and of the :mod:`conway` package, so that regressions can be spotted across commits.
+    This is done by the `main` function, which runs when this module is invoked as a script, e.g.:
+
+        python -m conway_test.benchmarks.scheduling_benchmark --max-tasks 20000
+
+    :param list[tuple[int, int]] shapes: list of (fan_out, depth) pairs to benchmark.
+    '''
+    def __init__(self, shapes):
+        self.shapes                                 = shapes
+
+    DEFAULT_SHAPES                                  = [(1000, 1), (10000, 1), (100000, 1),
+                                                       (100, 2), (300, 2),
+                                                       (10, 4), (10, 5)]
+
+    def task_count(fan_out, depth):
+        '''
+        Returns the number of coroutines in a tree with the given `fan_out` and `depth`
+        '''
+        return sum(fan_out ** level for level in range(1, depth + 1))
+
+    def run(self):
+        '''
+        Runs the benchmark for all shapes and returns a list of dictionaries, one per shape, with the measurements.
+        '''
+        result_l                                    = []
+        for fan_out, depth in self.shapes:
+            task_count                              = SchedulingBenchmark.task_count(fan_out, depth)
+
+            gather_seconds                          = self._time(self._gathered(fan_out, depth))
+            usher_seconds                           = self._time(self._ushered(SchedulingContext(), fan_out, depth,
+                                                                               log=False))
+            logged_usher_seconds                    = self._time(self._ushered(SchedulingContext(), fan_out, depth,
+                                                                               log=True))
+            flush_seconds                           = self._flush_seconds()
+
+            # Every coroutine logs a line, and so does the root of the tree
+            logged_lines                            = task_count + 1
+
+            result_l.append({
+                "fan_out":                          fan_out,
+                "depth":                            depth,
+                "tasks":                            task_count,
+                "gather_us_per_task":               self._micros(gather_seconds, task_count),
+                "usher_us_per_task":                self._micros(usher_seconds, task_count),
+                "usher_overhead_us_per_task":       self._micros(usher_seconds - gather_seconds, task_count),
+                "logged_usher_us_per_task":         self._micros(logged_usher_seconds, task_count),
+                "log_flush_us_per_line":            self._micros(flush_seconds, logged_lines),
+                "bytes_per_context":                asyncio.run(self._bytes_per_context(task_count)),
+            })
+        return result_l
+
+    async def _ushered(self, parent_context, fan_out, depth, log):
+        '''
+        Coroutine for a node of the tree: ushers `fan_out` children if `depth` > 0, or else just
+        yields once to the event loop
+        '''
+        if depth == 0:
+            await asyncio.sleep(0)
+        else:
+            result_l                                = []
+            async with UsheringTo(result_l) as usher:
+                for _ in range(fan_out):
+                    usher                           += self._ushered(SchedulingContext(parent_context), fan_out,
+                                                                     depth - 1, log)
+        if log:
+            Logger.log_info(f"Done with depth {depth}", xlabels=parent_context.as_xlabel())
+        return depth
+
+    async def _gathered(self, fan_out, depth):
+        '''
+        Baseline counterpart of `_ushered`, with the same tree of coroutines but none of the scheduling machinery
+        '''
+        if depth == 0:
+            await asyncio.sleep(0)
+        else:
+            await asyncio.gather(*[self._gathered(fan_out, depth - 1) for _ in range(fan_out)])
+        return depth
+
+    async def _bytes_per_context(self, count):
+        '''
+        Returns the average number of bytes allocated for each of `count` child scheduling contexts of a common parent
+        '''
+        parent_context                              = SchedulingContext()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before, _                               = tracemalloc.get_traced_memory()
+            context_l                               = [SchedulingContext(parent_context) for _ in range(count)]
+            after, _                                = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        del context_l
+        return round((after - before) / count)
+
+    def _time(self, coroutine):
+        '''
+        Returns the number of seconds it takes to run `coroutine` in a fresh event loop
+        '''
+        gc.collect()
+        start                                       = time.perf_counter()
+        asyncio.run(coroutine)
+        return time.perf_counter() - start
+
+    def _flush_seconds(self):
+        '''
+        Flushes the logs buffered by the schedule-based logger, which sorts them, and returns how long it took.
+        The logs are flushed to an in-memory stream instead of standard output, and the logger's log file is
+        turned off while flushing, so that only sorting and formatting are timed.
+        '''
+        logger                                      = Application.app().logger
+        log_file                                    = logger.log_file
+        logger.log_file                             = None
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                start                               = time.perf_counter()
+                logger.flush()
+                return time.perf_counter() - start
+        finally:
+            logger.log_file                         = log_file
+
+    def _micros(self, seconds, count):
+        return round(seconds * 1e6 / count, 3)
+
+
+def _git_commit(path):
+    '''
+    Returns the SHA of the GIT commit checked out in the repo containing `path`, or None if it isn't in a GIT repo
+    '''
+    try:
+        completion                                  = subprocess.run(["git", "rev-parse", "HEAD"],
+                                                                     cwd            = path,
+                                                                     capture_output = True,
+                                                                     text           = True)
+    except OSError:
+        return None
+    return completion.stdout.strip() if completion.returncode == 0 else None
+
+
+if __name__ == "__main__":
+    def main(args):
+        parser                                      = argparse.ArgumentParser(
+                                                            prog        = "scheduling_benchmark",
+                                                            description = SchedulingBenchmark.__doc__.split("\n\n")[0])
+        parser.add_argument("--max-tasks", type=int, default=None,
+                            help="skip the default shapes with more than this number of coroutines")
+        parser.add_argument("--shape", action="append", default=None, metavar="FAN_OUT,DEPTH",
+                            help="shape to benchmark, instead of the default ones. Can be repeated")
+        parser.add_argument("--results", default=f"{ConwayTestUtils.work_folder('benchmarks')}/scheduling_benchmark.jsonl",
+                            help="JSON lines file to which results are appended")
+        options                                     = parser.parse_args(args[1:])
+
+        if options.shape is not None:
+            shapes                                  = [tuple(int(n) for n in shape.split(",")) for shape in options.shape]
+        else:
+            shapes                                  = SchedulingBenchmark.DEFAULT_SHAPES
+        if options.max_tasks is not None:
+            shapes                                  = [(f, d) for (f, d) in shapes
+                                                       if SchedulingBenchmark.task_count(f, d) <= options.max_tasks]
+
+        result_l                                    = SchedulingBenchmark(shapes).run()
+
+        # Find the last recorded run from a different commit, if any, to show how the new results compare to it
+        this_commit                                 = _git_commit(_os.path.dirname(__file__))
+        conway_commit                               = _git_commit(list(conway.__path__)[0])
+        previous_dict                               = {}
+        if _os.path.exists(options.results):
+            with open(options.results) as file:
+                for line in file:
+                    run                             = json.loads(line)
+                    if (run["conway_test_commit"], run["conway_commit"]) != (this_commit, conway_commit):
+                        previous_dict               = {(r["fan_out"], r["depth"]): r for r in run["results"]}
+
+        print(f"{'shape':>12} {'tasks':>8} {'usher us/task':>14} {'overhead us':>12} {'logged us':>10} "
+              + f"{'flush us/line':>14} {'B/context':>10} {'vs previous':>12}")
+        for r in result_l:
+            previous                                = previous_dict.get((r["fan_out"], r["depth"]))
+            if previous is not None:
+                change                              = f"{100 * (r['usher_us_per_task'] / previous['usher_us_per_task'] - 1):+.1f}%"
+            else:
+                change                              = "n/a"
+            print(f"{str(r['fan_out']) + 'x' + str(r['depth']):>12} {r['tasks']:>8} {r['usher_us_per_task']:>14} "
+                  + f"{r['usher_overhead_us_per_task']:>12} {r['logged_usher_us_per_task']:>10} "
+                  + f"{r['log_flush_us_per_line']:>14} {r['bytes_per_context']:>10} {change:>12}")
+
+        _os.makedirs(_os.path.dirname(options.results), exist_ok=True)
+        with open(options.results, "a") as file:
+            file.write(json.dumps({
+                "timestamp":            datetime.datetime.now().isoformat(timespec="seconds"),
+                "conway_test_commit":   this_commit,
+                "conway_commit":        conway_commit,
+                "python":               _sys.version.split()[0],
+                "results":              result_l,
+            }) + "\n")
+        print(f"\nResults appended to {options.results}")
+
+    main(_sys.argv)
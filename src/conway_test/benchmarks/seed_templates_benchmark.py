@@ -0,0 +1,116 @@
+import argparse
+import os                                                                           as _os
+import sys                                                                          as _sys
+import tempfile
+import time
+
+from conway_acceptance.util.scenarios_config                                        import ScenariosConfig
+from conway_acceptance.util.test_statics                                            import TestStatics
+
+from conway_test.framework.scenario_foundry.operator_scenario_manifest              import OperatorScenarioManifest
+from conway_test.framework.test_database.chassis_seed_templates                     import Chassis_SeedTemplates
+from conway_test.framework.test_database.operator_test_database                     import Operator_TestDatabase
+from conway_test.util.chassis_test_statics                                          import Chassis_TestStatics
+
+
+class SeedTemplatesBenchmark():
+
+    '''
+    Benchmark for the :class:`Chassis_SeedTemplates` used when ``CONWAY_TEST_SEED_TEMPLATES`` is on, to check that
+    populating a test database from a template beats populating it from its seed.
+
+    For each scenario, the test database is populated repeatedly from the seed for round 0, as test cases do, in
+    three ways:
+
+    * Without templates, i.e., by the data hubs' ``populate_from_seed``.
+    * With templates, the first time, which populates from the seed and then saves the templates.
+    * With templates, afterwards, which copies the templates. Part of this is fingerprinting the seed, to find out
+      whether the templates are up to date, which is also measured on its own.
+
+    Templates are kept in a temporary folder, so that the benchmark doesn't disturb those of test runs.
+    This is done by the `main` function, which runs when this module is invoked as a script, e.g.:
+
+        python -m conway_test.benchmarks.seed_templates_benchmark test_repo_setup --repetitions 5
+
+    :param list[str] test_case_names: names of the test cases whose scenarios are benchmarked, as given to
+        :class:`Chassis_TestContext`.
+    :param int repetitions: number of times each way of populating is timed. The median is reported.
+    '''
+    def __init__(self, test_case_names, repetitions=5):
+        self.test_case_names                        = test_case_names
+        self.repetitions                            = repetitions
+
+    # Folders of a seed from which data hubs are populated
+    HUB_FOLDERS                                     = [Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER,
+                                                       Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER]
+
+    def run(self):
+        '''
+        Runs the benchmark for all scenarios and returns a list of dictionaries, one per scenario, with the
+        measurements.
+        '''
+        scenarios_repo                              = _os.environ.get(TestStatics.SCENARIOS_REPO)
+        if scenarios_repo is None:
+            raise ValueError(f"Environment variable '{TestStatics.SCENARIOS_REPO}' is not set")
+
+        result_l                                    = []
+        for test_case_name in self.test_case_names:
+            scenario_id                             = ScenariosConfig(scenarios_repo).get_scenario_id(test_case_name)
+            manifest                                = OperatorScenarioManifest(scenarios_repo, scenario_id)
+
+            with tempfile.TemporaryDirectory() as templates_folder:
+                seed_templates                      = Chassis_SeedTemplates(templates_folder)
+                seed_seconds                        = self._median(lambda: Operator_TestDatabase(manifest)
+                                                                                .populate_from_seed())
+                save_seconds                        = self._time(lambda: Operator_TestDatabase(manifest, seed_templates=seed_templates)
+                                                                                .populate_from_seed())
+                template_seconds                    = self._median(lambda: Operator_TestDatabase(manifest, seed_templates=seed_templates)
+                                                                                .populate_from_seed())
+                seed_folder                         = manifest.path_to_seed()
+                fingerprint_seconds                 = self._median(lambda: [seed_templates._fingerprint(f"{seed_folder}/{folder}")
+                                                                            for folder in self.HUB_FOLDERS])
+
+            result_l.append({
+                "test_case":                        test_case_name,
+                "scenario_id":                      scenario_id,
+                "seed_ms":                          round(seed_seconds * 1e3, 1),
+                "first_template_ms":                round(save_seconds * 1e3, 1),
+                "template_ms":                      round(template_seconds * 1e3, 1),
+                "fingerprint_ms":                   round(fingerprint_seconds * 1e3, 1),
+                "speedup":                          round(seed_seconds / template_seconds, 2),
+            })
+        return result_l
+
+    def _median(self, function):
+        '''
+        Returns the median number of seconds it takes to call `function`, over `self.repetitions` calls
+        '''
+        seconds_l                                   = sorted(self._time(function) for _ in range(self.repetitions))
+        return seconds_l[len(seconds_l) // 2]
+
+    def _time(self, function):
+        start                                       = time.perf_counter()
+        function()
+        return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    def main(args):
+        parser                                      = argparse.ArgumentParser(
+                                                            prog        = "seed_templates_benchmark",
+                                                            description = SeedTemplatesBenchmark.__doc__.split("\n\n")[0])
+        parser.add_argument("tests", nargs="+",
+                            help="names of the test cases whose scenarios to benchmark, e.g., test_repo_setup")
+        parser.add_argument("--repetitions", type=int, default=5,
+                            help="number of times each way of populating is timed")
+        options                                     = parser.parse_args(args[1:])
+
+        result_l                                    = SeedTemplatesBenchmark(options.tests, options.repetitions).run()
+
+        print(f"{'test case':>30} {'seed ms':>10} {'1st template ms':>16} {'template ms':>12} "
+              + f"{'fingerprint ms':>15} {'speedup':>8}")
+        for r in result_l:
+            print(f"{r['test_case']:>30} {r['seed_ms']:>10} {r['first_template_ms']:>16} {r['template_ms']:>12} "
+                  + f"{r['fingerprint_ms']:>15} {r['speedup']:>8}")
+
+    main(_sys.argv)
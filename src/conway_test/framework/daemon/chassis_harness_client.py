@@ -0,0 +1,152 @@
+import argparse
+import json
+import os                                                                   as _os
+import socket
+import sys                                                                  as _sys
+
+
+class Chassis_HarnessClient():
+
+    '''
+    Thin client for the :class:`Chassis_HarnessDaemon`: submits requests to it over its Unix socket and streams back
+    the output of the test runs it does on our behalf.
+
+    This module only uses the standard library, and in particular doesn't import ``conway_test`` (whose
+    ``__init__.py`` imports the whole conway stack), so that the client starts instantly when run as a script, e.g.:
+
+        python src/conway_test/framework/daemon/chassis_harness_client.py onboarding.test_repo_setup
+
+    :param str socket_path: absolute path to the daemon's socket. If None, the default path is used, as given by
+        :meth:`default_socket_path`.
+    '''
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path                             = Chassis_HarnessClient.default_socket_path()
+        self.socket_path                            = socket_path
+
+    # These mirror Chassis_TestStatics.DAEMON_SOCKET, WORK_FOLDER, DAEMON_FOLDER and DAEMON_SOCKET_FILE, which
+    # we can't import without importing the conway stack
+    #
+    DAEMON_SOCKET                                   = "CONWAY_TEST_DAEMON_SOCKET"
+    WORK_FOLDER                                     = "CONWAY_TEST_WORK_FOLDER"
+    DAEMON_FOLDER                                   = "daemon"
+    DAEMON_SOCKET_FILE                              = "harness.sock"
+
+    def default_socket_path():
+        '''
+        Returns the path of the socket on which the daemon listens unless told otherwise: the value of the
+        environment variable in `DAEMON_SOCKET` if set, or otherwise a file in the harness' work folder.
+
+        :rtype: str
+        '''
+        socket_path                                 = _os.environ.get(Chassis_HarnessClient.DAEMON_SOCKET)
+        if socket_path is not None:
+            return socket_path
+        root                                        = _os.environ.get(Chassis_HarnessClient.WORK_FOLDER)
+        if root is None:
+            root                                    = _os.path.expanduser("~/.cache/conway_test")
+        return f"{root}/{Chassis_HarnessClient.DAEMON_FOLDER}/{Chassis_HarnessClient.DAEMON_SOCKET_FILE}"
+
+    def run(self, test_names, reload_prefixes=None, verbosity=2, out=None):
+        '''
+        Asks the daemon to run some tests, writing their output to `out` as it arrives.
+
+        The tests run with the daemon's environment variables, overridden by those of this process, so that harness
+        modes (e.g., ``CONWAY_TEST_FAIL_FAST``) can be chosen per run.
+
+        :param list[str] test_names: names of the tests to run, as accepted by :mod:`unittest` (modules, classes or
+            methods). Names that don't start with "conway_test." are taken as relative to
+            ``conway_test.tests_conway_ops``, so for example "onboarding.test_repo_setup" is a valid name.
+        :param list[str] reload_prefixes: prefixes of the names of modules the daemon should reload before running
+            the tests, in addition to the test modules it always reloads. For example, "conway_ops" to pick up
+            changes in the code under test.
+        :param int verbosity: verbosity of the :class:`unittest.TextTestRunner` used by the daemon
+        :param out: file-like object to which output is written. If None, it is ``sys.stdout``.
+
+        :returns: the final message from the daemon, with keys like "was_successful", "tests_run", "failures",
+            "errors" and "seconds"
+        :rtype: dict
+        '''
+        return self.request({"command":     "run",
+                             "tests":       test_names,
+                             "reload":      reload_prefixes or [],
+                             "verbosity":   verbosity,
+                             "env":         dict(_os.environ)},
+                            out = out)
+
+    def ping(self):
+        '''
+        Returns the daemon's status, with keys like "pid" and "runs_served". Raises an exception if no daemon
+        listens on our socket.
+
+        :rtype: dict
+        '''
+        return self.request({"command": "ping"})
+
+    def shutdown(self):
+        '''
+        Asks the daemon to stop once it has answered this request
+        '''
+        return self.request({"command": "shutdown"})
+
+    def request(self, request_dict, out=None):
+        '''
+        Sends `request_dict` to the daemon and returns its final message, writing any output streamed before it
+        to `out` (or ``sys.stdout`` if None).
+
+        The protocol is one JSON object per line in both directions: the client sends a single request, and the
+        daemon answers with any number of messages of kind "output" followed by one of kind "result" or "error".
+
+        :param dict request_dict: the request, with at least a "command" key
+        :rtype: dict
+        '''
+        out                                         = out or _sys.stdout
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as connection:
+            connection.connect(self.socket_path)
+            connection.sendall((json.dumps(request_dict) + "\n").encode("utf-8"))
+            with connection.makefile("r", encoding="utf-8") as reader:
+                for line in reader:
+                    message_dict                    = json.loads(line)
+                    if message_dict["kind"] == "output":
+                        out.write(message_dict["text"])
+                        out.flush()
+                    else:
+                        return message_dict
+        raise ConnectionError(f"Harness daemon at '{self.socket_path}' closed the connection without a result")
+
+
+if __name__ == "__main__":
+    def main(args):
+        parser                                      = argparse.ArgumentParser(
+                                                            description = "Runs tests in the warm harness daemon")
+        parser.add_argument("tests", nargs="*",
+                            help="tests to run, e.g., onboarding.test_repo_setup.TestRepoSetup.test_repo_setup")
+        parser.add_argument("--socket", default=None,
+                            help="path to the daemon's socket")
+        parser.add_argument("--reload", action="append", default=[],
+                            help="prefix of additional modules to reload before running, e.g., conway_ops")
+        parser.add_argument("--quiet", action="store_true",
+                            help="only report a summary of the run")
+        parser.add_argument("--ping", action="store_true",
+                            help="show the daemon's status instead of running tests")
+        parser.add_argument("--shutdown", action="store_true",
+                            help="stop the daemon instead of running tests")
+        options                                     = parser.parse_args(args[1:])
+
+        client                                      = Chassis_HarnessClient(options.socket)
+        if options.ping or options.shutdown:
+            result_dict                             = client.ping() if options.ping else client.shutdown()
+            print(json.dumps(result_dict, indent=4))
+            return 0
+
+        if len(options.tests) == 0:
+            parser.error("no tests given")
+        result_dict                                 = client.run(options.tests,
+                                                                 reload_prefixes    = options.reload,
+                                                                 verbosity          = 1 if options.quiet else 2)
+        if result_dict["kind"] == "error":
+            print(result_dict["message"], file=_sys.stderr)
+            return 2
+        return 0 if result_dict["was_successful"] else 1
+
+    _sys.exit(main(_sys.argv))
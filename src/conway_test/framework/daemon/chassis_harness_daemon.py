@@ -0,0 +1,239 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os                                                                   as _os
+import pkgutil
+import socket
+import sys                                                                  as _sys
+import time
+import traceback
+import unittest
+
+from conway_test.util.chassis_test_statics                                 import Chassis_TestStatics
+from conway_test.util.conway_test_utils                                    import ConwayTestUtils
+
+
+class Chassis_HarnessDaemon():
+
+    '''
+    Long-lived process that runs test cases on behalf of a :class:`Chassis_HarnessClient`, so that the startup work
+    that every ``python -m unittest`` repeats (importing the conway stack, building the
+    :class:`Chassis_Test_Application`, spinning up the threads of background harness modes) is only done once.
+
+    The daemon listens on a Unix socket and serves one request at a time, since test cases share global state (the
+    application singleton, environment variables, patched library functions). For each run it:
+
+    * reloads the test modules (and any other modules the client asks for), so that edits to them are picked up.
+      Edits to other modules, such as the harness framework itself, require restarting the daemon.
+    * applies the client's environment variables on top of its own, for the duration of the run.
+    * runs the tests with :mod:`unittest`, streaming everything they print back to the client, and then sends a
+      summary of the results.
+
+    Besides imported modules and the application, the daemon keeps warm across runs:
+
+    * Pre-seeded template databases: the daemon turns on ``CONWAY_TEST_SEED_TEMPLATES`` unless told otherwise, so
+      that after a scenario's first run its test database is populated by copying a template instead of seeding
+      from cold. See :class:`Chassis_SeedTemplates`.
+    * The worksheets loaded by the cache of expected Excels, when ``CONWAY_TEST_CACHE_EXPECTED_EXCELS`` is on.
+    * The threads of the trash collector, when ``CONWAY_TEST_BACKGROUND_TEARDOWN`` is on.
+
+    The scenario catalog and user profiles are still parsed by each test context, so that edits to them are picked
+    up without restarting the daemon.
+
+    :param str socket_path: absolute path to the Unix socket to listen on. If None, the value of the environment
+        variable Chassis_TestStatics.DAEMON_SOCKET is used, or a file in the harness' work folder.
+    '''
+    def __init__(self, socket_path=None):
+        if socket_path is None:
+            socket_path                             = _os.environ.get(Chassis_TestStatics.DAEMON_SOCKET)
+        if socket_path is None:
+            socket_path                             = f"{ConwayTestUtils.work_folder(Chassis_TestStatics.DAEMON_FOLDER)}" \
+                                                        + f"/{Chassis_TestStatics.DAEMON_SOCKET_FILE}"
+        self.socket_path                            = socket_path
+        self.runs_served                            = 0
+
+        # Clients' environments are applied on top of ours, so clients can still turn this off
+        _os.environ.setdefault(Chassis_TestStatics.SEED_TEMPLATES, "1")
+
+        self._stopping                              = False
+
+    # Package with the test modules. Test names that are not fully qualified are relative to it
+    TESTS_PACKAGE                                   = "conway_test.tests_conway_ops"
+
+    # Prefixes of the names of modules that are reloaded before each run
+    ALWAYS_RELOADED                                 = ["conway_test.tests_"]
+
+    def warm_up(self):
+        '''
+        Imports all test modules, and with them the code they test, so that the first run is as fast as later ones
+        '''
+        package                                     = importlib.import_module(self.TESTS_PACKAGE)
+        for module_info in pkgutil.walk_packages(package.__path__, prefix=self.TESTS_PACKAGE + "."):
+            importlib.import_module(module_info.name)
+
+    def serve_forever(self):
+        '''
+        Serves requests until a client asks the daemon to shut down
+        '''
+        self._claim_socket_path()
+        server                                      = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            server.bind(self.socket_path)
+            server.listen()
+            while not self._stopping:
+                connection, _                       = server.accept()
+                with connection:
+                    self._handle(connection)
+        finally:
+            server.close()
+            if _os.path.exists(self.socket_path):
+                _os.remove(self.socket_path)
+
+    def _claim_socket_path(self):
+        '''
+        Makes sure that we can bind to our socket path, removing a socket left behind by a daemon that died.
+        Raises an exception if another daemon is listening on it.
+        '''
+        _os.makedirs(_os.path.dirname(self.socket_path), exist_ok=True)
+        if not _os.path.exists(self.socket_path):
+            return
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.socket_path)
+            except ConnectionRefusedError:
+                _os.remove(self.socket_path)
+                return
+        raise RuntimeError(f"Another harness daemon is already listening on '{self.socket_path}'")
+
+    def _handle(self, connection):
+        '''
+        Reads a request from `connection` and answers it
+        '''
+        stream                                      = _SocketStream(connection)
+        with connection.makefile("r", encoding="utf-8") as reader:
+            line                                    = reader.readline()
+        try:
+            request_dict                            = json.loads(line)
+        except ValueError:
+            stream.send({"kind": "error", "message": f"Malformed request: {line!r}"})
+            return
+
+        command                                     = request_dict.get("command")
+        if command == "ping":
+            stream.send({"kind": "result", "pid": _os.getpid(), "runs_served": self.runs_served})
+        elif command == "shutdown":
+            self._stopping                          = True
+            stream.send({"kind": "result", "pid": _os.getpid(), "runs_served": self.runs_served})
+        elif command == "run":
+            stream.send(self._run(request_dict, stream))
+            self.runs_served                        += 1
+        else:
+            stream.send({"kind": "error", "message": f"Unknown command '{command}'"})
+
+    def _run(self, request_dict, stream):
+        '''
+        Runs the tests in `request_dict`, streaming their output to `stream`, and returns the final message for
+        the client
+        '''
+        try:
+            self._reload(self.ALWAYS_RELOADED + request_dict.get("reload", []))
+        except Exception:
+            return {"kind": "error", "message": "Could not reload modules:\n" + traceback.format_exc()}
+
+        test_names                                  = [name if name.startswith("conway_test.")
+                                                       else f"{self.TESTS_PACKAGE}.{name}"
+                                                       for name in request_dict.get("tests", [])]
+        start                                       = time.perf_counter()
+        with self._environment(request_dict.get("env", {})), \
+             contextlib.redirect_stdout(stream), contextlib.redirect_stderr(stream):
+            try:
+                suite                               = unittest.defaultTestLoader.loadTestsFromNames(test_names)
+                runner                              = unittest.TextTestRunner(stream    = stream,
+                                                                              verbosity = request_dict.get("verbosity", 2))
+                result                              = runner.run(suite)
+            except Exception:
+                return {"kind": "error", "message": traceback.format_exc()}
+
+        return {"kind":                     "result",
+                "was_successful":           result.wasSuccessful(),
+                "tests_run":                result.testsRun,
+                "failures":                 len(result.failures),
+                "errors":                   len(result.errors),
+                "skipped":                  len(result.skipped),
+                "expected_failures":        len(result.expectedFailures),
+                "unexpected_successes":     len(result.unexpectedSuccesses),
+                "seconds":                  round(time.perf_counter() - start, 3)}
+
+    def _reload(self, prefixes):
+        '''
+        Reloads all imported modules whose names start with any of the `prefixes`, in the order in which they were
+        first imported, so that modules are reloaded after the modules they import
+        '''
+        name_l                                      = [name for name, module in list(_sys.modules.items())
+                                                       if module is not None and any(name.startswith(p) for p in prefixes)]
+        for name in name_l:
+            importlib.reload(_sys.modules[name])
+
+    @contextlib.contextmanager
+    def _environment(self, env_dict):
+        '''
+        Context manager that overrides the daemon's environment variables with those in `env_dict`, and restores
+        them on exit
+        '''
+        saved_dict                                  = dict(_os.environ)
+        _os.environ.update(env_dict)
+        try:
+            yield
+        finally:
+            _os.environ.clear()
+            _os.environ.update(saved_dict)
+
+
+class _SocketStream():
+
+    '''
+    File-like object that sends whatever is written to it to a client, as messages of kind "output". If the client
+    goes away, output is dropped so that the run can complete anyway.
+    '''
+    def __init__(self, connection):
+        self.connection                             = connection
+        self.disconnected                           = False
+
+    def write(self, text):
+        if len(text) > 0:
+            self.send({"kind": "output", "text": text})
+        return len(text)
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def send(self, message_dict):
+        if self.disconnected:
+            return
+        try:
+            self.connection.sendall((json.dumps(message_dict) + "\n").encode("utf-8"))
+        except OSError:
+            self.disconnected                       = True
+
+
+if __name__ == "__main__":
+    def main(args):
+        parser                                      = argparse.ArgumentParser(
+                                                            description = "Serves test runs from a warm harness")
+        parser.add_argument("--socket", default=None,
+                            help="path of the Unix socket to listen on")
+        parser.add_argument("--no-warm-up", action="store_true",
+                            help="don't import the test modules until the first run")
+        options                                     = parser.parse_args(args[1:])
+
+        daemon                                      = Chassis_HarnessDaemon(options.socket)
+        if not options.no_warm_up:
+            daemon.warm_up()
+        print(f"Harness daemon (pid {_os.getpid()}) listening on {daemon.socket_path}", flush=True)
+        daemon.serve_forever()
+
+    main(_sys.argv)
@@ -0,0 +1,232 @@
+import contextlib
+import os                                                                   as _os
+import sys                                                                  as _sys
+import threading
+import tracemalloc
+
+import yaml
+
+
+class Chassis_MemoryProfiler():
+
+    '''
+    Opt-in memory profiler used by the :class:`Chassis_TestContext` to find out how much memory each phase of a test
+    case consumes (e.g., seeding the test database, or creating a repo report).
+
+    For each phase it captures:
+
+    * The peak and retained memory allocated by Python code, as traced by :mod:`tracemalloc`
+    * The resident set size (RSS) of the process at the start and end of the phase, and the peak RSS observed
+      by a background thread that samples it periodically. This covers memory that :mod:`tracemalloc` can't see,
+      such as allocations done by C extensions.
+    * The allocation sites responsible for the retained memory, grouped by the module that owns them. Only modules
+      under the packages in `modules_of_interest` are reported.
+
+    Results are saved as a YAML file so that they can be committed alongside the run notes and diffed in
+    code reviews. For that reason sizes are rounded to KiB and no timestamps are included.
+
+    :param list[str] modules_of_interest: top-level packages whose allocation sites should be reported. If None,
+        it defaults to `MODULES_OF_INTEREST`.
+    :param int top_sites: maximal number of allocation sites reported for each module.
+    :param float sampling_interval: number of seconds between consecutive samples of the RSS.
+    '''
+    def __init__(self, modules_of_interest  = None,
+                       top_sites            = 10,
+                       sampling_interval    = 0.05):
+
+        if modules_of_interest is None:
+            modules_of_interest                     = self.MODULES_OF_INTEREST
+        self.modules_of_interest                    = modules_of_interest
+        self.top_sites                              = top_sites
+        self.sampling_interval                      = sampling_interval
+
+        # List of dictionaries, one per phase, in the order in which phases ran
+        self.phase_l                                = []
+
+        self._active_phase                          = None
+        self._started_tracemalloc                   = False
+
+    MODULES_OF_INTEREST                             = ["conway_ops", "conway_acceptance"]
+
+    # Number of frames kept by tracemalloc for each allocation. We need more than 1 frame because the innermost
+    # frame is usually in the standard library or a 3rd party library, and we want to attribute the allocation
+    # to the module of interest that triggered it
+    #
+    TRACEBACK_DEPTH                                 = 25
+
+    def start(self):
+        '''
+        Starts tracing memory allocations, unless some other party already started tracing them
+        '''
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.TRACEBACK_DEPTH)
+            self._started_tracemalloc               = True
+
+    def stop(self):
+        '''
+        Stops tracing memory allocations, if it was this profiler that started tracing them
+        '''
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc               = False
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''
+        Context manager that profiles the memory consumed by the code it wraps, recording the results under
+        the given phase `name`.
+
+        Phases can't be nested, since the peak memory of the outer phase would be reset by the inner phase.
+
+        :param str name: name of the phase, e.g., "create_repo_report"
+        '''
+        if self._active_phase is not None:
+            raise ValueError(f"Can't start memory profiling phase '{name}' while phase '{self._active_phase}' "
+                             + "is still active: phases can't be nested")
+        self._active_phase                          = name
+        self.start()
+
+        sampler                                     = _RSS_Sampler(self.sampling_interval)
+        before_snapshot                             = self._take_snapshot()
+        tracemalloc.reset_peak()
+        traced_before, _                            = tracemalloc.get_traced_memory()
+        sampler.start()
+        try:
+            yield self
+        finally:
+            sampler.stop()
+            traced_after, traced_peak               = tracemalloc.get_traced_memory()
+            after_snapshot                          = self._take_snapshot()
+            self._active_phase                      = None
+
+            self.phase_l.append({
+                "phase":                name,
+                "traced_peak_kib":      self._kib(traced_peak - traced_before),
+                "traced_retained_kib":  self._kib(traced_after - traced_before),
+                "rss_start_mib":        self._mib(sampler.rss_start),
+                "rss_peak_mib":         self._mib(sampler.rss_peak),
+                "rss_end_mib":          self._mib(sampler.rss_end),
+                "modules":              self._sites_by_module(after_snapshot, before_snapshot),
+            })
+
+    def save(self, path):
+        '''
+        Saves the results of all phases profiled so far as a YAML file.
+
+        :param str path: absolute path for the YAML file to create. Parent folders are created if needed.
+        '''
+        _os.makedirs(_os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            yaml.safe_dump({"phases": self.phase_l}, file, sort_keys=False)
+
+    def _take_snapshot(self):
+        '''
+        Returns a tracemalloc snapshot without the allocations done by tracemalloc itself or by this module
+        '''
+        snapshot                                    = tracemalloc.take_snapshot()
+        return snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__),
+                                       tracemalloc.Filter(False, __file__)])
+
+    def _sites_by_module(self, after_snapshot, before_snapshot):
+        '''
+        Returns a dictionary whose keys are module names, and whose values are dictionaries describing
+        how much memory was retained by allocations triggered from that module between `before_snapshot`
+        and `after_snapshot`, and what were the top allocation sites in that module.
+
+        Each allocation is attributed to the innermost frame of its traceback that belongs to a module
+        of interest. Allocations with no such frame are not reported.
+        '''
+        module_for_file                             = self._module_for_file()
+
+        sizes_by_module                             = {}
+        for stat in after_snapshot.compare_to(before_snapshot, "traceback"):
+            if stat.size_diff <= 0:
+                continue
+            # Frames are sorted from oldest to most recent, so search from the end to find the innermost one
+            for frame in reversed(stat.traceback):
+                module                              = module_for_file.get(frame.filename)
+                if module is None:
+                    continue
+                site                                = f"{module}:{frame.lineno}"
+                module_sites                        = sizes_by_module.setdefault(module, {})
+                module_sites[site]                  = module_sites.get(site, 0) + stat.size_diff
+                break
+
+        result_dict                                 = {}
+        ranked_modules                              = sorted(sizes_by_module.items(),
+                                                             key        = lambda item: sum(item[1].values()),
+                                                             reverse    = True)
+        for module, sites_dict in ranked_modules:
+            ranked_sites                            = sorted(sites_dict.items(), key=lambda item: item[1], reverse=True)
+            result_dict[module]                     = {
+                "retained_kib":     self._kib(sum(sites_dict.values())),
+                "top_sites_kib":    {site: self._kib(size) for site, size in ranked_sites[:self.top_sites]},
+            }
+
+        return result_dict
+
+    def _module_for_file(self):
+        '''
+        Returns a dictionary mapping the filename of each loaded module of interest to the module's name
+        '''
+        result_dict                                 = {}
+        for name, module in list(_sys.modules.items()):
+            if not any(name == prefix or name.startswith(prefix + ".") for prefix in self.modules_of_interest):
+                continue
+            filename                                = getattr(module, "__file__", None)
+            if filename is not None:
+                result_dict[filename]               = name
+        return result_dict
+
+    def _kib(self, nb_bytes):
+        return round(nb_bytes / 1024, 1)
+
+    def _mib(self, nb_bytes):
+        if nb_bytes is None:
+            return None
+        return round(nb_bytes / (1024 * 1024), 1)
+
+
+class _RSS_Sampler(threading.Thread):
+
+    '''
+    Helper thread used by the :class:`Chassis_MemoryProfiler` to periodically sample the resident set size
+    of the current process, in order to estimate its peak during a phase.
+
+    The RSS is read from ``/proc/self/statm``, so it is only available on Linux. On other platforms all
+    RSS measurements are None.
+
+    :param float sampling_interval: number of seconds between consecutive samples.
+    '''
+    def __init__(self, sampling_interval):
+        super().__init__(daemon=True)
+        self.sampling_interval                      = sampling_interval
+        self.rss_start                              = self.current_rss()
+        self.rss_peak                               = self.rss_start
+        self.rss_end                                = None
+        self._stop_event                            = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.sampling_interval):
+            self._record(self.current_rss())
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.rss_end                                = self.current_rss()
+        self._record(self.rss_end)
+
+    def _record(self, rss):
+        if rss is not None and (self.rss_peak is None or rss > self.rss_peak):
+            self.rss_peak                           = rss
+
+    def current_rss(self):
+        '''
+        Returns the resident set size of the current process, in bytes, or None if it can't be determined
+        '''
+        try:
+            with open("/proc/self/statm") as file:
+                resident_pages                      = int(file.read().split()[1])
+            return resident_pages * _os.sysconf("SC_PAGE_SIZE")
+        except (OSError, ValueError, IndexError):
+            return None
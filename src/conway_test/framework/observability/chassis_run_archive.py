@@ -0,0 +1,292 @@
+import argparse
+import concurrent.futures
+import datetime
+import hashlib
+import json
+import os                                                                   as _os
+import stat                                                                 as _stat
+import sys                                                                  as _sys
+import uuid
+import zlib
+
+
+class Chassis_RunArchive():
+
+    '''
+    Local, content-addressed store of the outputs of past test runs (actuals and run notes), used to keep a history
+    of runs for post-mortems without storing the mostly identical trees of every run again and again.
+
+    Each file is split into fixed-size chunks, and each chunk is stored once, compressed with zlib, under the SHA-256
+    of its content. So a new run only adds the chunks that changed since any previous run, and disk usage grows in
+    proportion to actual change. The store has this layout:
+
+    * ``objects/ab/cdef...``, one file per distinct chunk, named after its hash
+    * ``runs/<run id>.json``, one manifest per run, mapping the relative path of every archived file, folder and
+      symbolic link to its mode and, for files, to its size and the hashes of its chunks
+
+    Run ids look like ``8002@260112.093015.4f2a1c``, i.e., the scenario id, when the run was archived, and a random
+    suffix. Since manifests list chunk hashes, diffing two runs only reads their manifests, and checking out a run only
+    reads the chunks it needs.
+
+    :param str store_folder: absolute path to the folder of the store. It is created if needed.
+    :param int max_workers: number of threads used to hash, compress and decompress files. If None, it is chosen as
+        in :class:`concurrent.futures.ThreadPoolExecutor`.
+    '''
+    def __init__(self, store_folder, max_workers=None):
+        self.store_folder                           = store_folder
+        self.max_workers                            = max_workers
+
+        _os.makedirs(f"{store_folder}/objects", exist_ok=True)
+        _os.makedirs(f"{store_folder}/runs", exist_ok=True)
+
+    CHUNK_SIZE                                      = 256 * 1024
+
+    def archive(self, scenario_id, roots_dict):
+        '''
+        Archives the content of some folders as a new run of a scenario.
+
+        :param str scenario_id: id of the scenario that was run, e.g., "8002"
+        :param dict roots_dict: maps names (e.g., "ACTUALS", "RUN_NOTES") to the absolute path of the folders to
+            archive under those names. Folders that don't exist are skipped.
+
+        :returns: the manifest of the new run, whose "run_id" key has the id by which it can be checked out or diffed
+        :rtype: dict
+        '''
+        now                                         = datetime.datetime.now()
+        run_id                                      = f"{scenario_id}@{now:%y%m%d.%H%M%S}.{uuid.uuid4().hex[:6]}"
+
+        entries_dict                                = {}
+        file_l                                      = []
+        for name, root in roots_dict.items():
+            if not _os.path.isdir(root):
+                continue
+            entries_dict[name]                      = {"mode": _stat.S_IMODE(_os.stat(root).st_mode), "kind": "folder"}
+            for parent, folder_l, name_l in _os.walk(root):
+                for child in folder_l + name_l:
+                    path                            = _os.path.join(parent, child)
+                    relative_path                   = f"{name}/{_os.path.relpath(path, root).replace(_os.sep, '/')}"
+                    mode                            = _os.lstat(path).st_mode
+                    if _stat.S_ISLNK(mode):
+                        entries_dict[relative_path] = {"mode": _stat.S_IMODE(mode), "kind": "link",
+                                                       "target": _os.readlink(path)}
+                    elif _stat.S_ISDIR(mode):
+                        entries_dict[relative_path] = {"mode": _stat.S_IMODE(mode), "kind": "folder"}
+                    elif _stat.S_ISREG(mode):
+                        file_l.append((relative_path, path, _stat.S_IMODE(mode)))
+
+        stored_bytes                                = 0
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for (relative_path, _, mode), (size, chunk_l, new_bytes) in zip(
+                                                        file_l, executor.map(lambda f: self._store_file(f[1]), file_l)):
+                entries_dict[relative_path]         = {"mode": mode, "kind": "file", "size": size, "chunks": chunk_l}
+                stored_bytes                        += new_bytes
+
+        manifest_dict                               = {
+            "run_id":           run_id,
+            "scenario_id":      str(scenario_id),
+            "timestamp":        now.isoformat(timespec="seconds"),
+            "roots":            roots_dict,
+            "total_bytes":      sum(e.get("size", 0) for e in entries_dict.values()),
+            "stored_bytes":     stored_bytes,
+            "entries":          dict(sorted(entries_dict.items())),
+        }
+        self._write_atomically(self._path_to_manifest(run_id), json.dumps(manifest_dict).encode("utf-8"))
+        return manifest_dict
+
+    def runs(self, scenario_id=None):
+        '''
+        Returns the ids of archived runs, oldest first.
+
+        :param str scenario_id: if not None, only runs of this scenario are returned
+        :rtype: list[str]
+        '''
+        run_l                                       = [name[:-len(".json")] for name in _os.listdir(f"{self.store_folder}/runs")
+                                                       if name.endswith(".json")]
+        if scenario_id is not None:
+            run_l                                   = [r for r in run_l if r.startswith(f"{scenario_id}@")]
+        return sorted(run_l, key=lambda r: r.split("@", 1)[1])
+
+    def manifest(self, run_id):
+        '''
+        Returns the manifest of the run `run_id`, as returned by :meth:`archive` when the run was archived
+
+        :rtype: dict
+        '''
+        with open(self._path_to_manifest(run_id)) as file:
+            return json.load(file)
+
+    def checkout(self, run_id, destination, prefix=None):
+        '''
+        Recreates the archived content of a run under the `destination` folder, which is created if needed.
+        Files that already exist there are overwritten.
+
+        :param str run_id: id of the run to check out
+        :param str destination: absolute path of the folder in which to recreate the run's content. Each archived
+            root is recreated as a subfolder named like it, e.g., ``destination/ACTUALS``.
+        :param str prefix: if not None, only entries whose relative path is `prefix` or under it are checked out,
+            e.g., "ACTUALS/RepoStats.xlsx"
+
+        :returns: the number of files checked out
+        :rtype: int
+        '''
+        entries_dict                                = self.manifest(run_id)["entries"]
+        if prefix is not None:
+            entries_dict                            = {p: e for p, e in entries_dict.items()
+                                                       if p == prefix or p.startswith(prefix.rstrip("/") + "/")}
+
+        # Folders first, from the top down, so that files have somewhere to go. Folder modes are applied at the end,
+        # in case some folder is read-only
+        #
+        for relative_path, entry in entries_dict.items():
+            if entry["kind"] == "folder":
+                _os.makedirs(_os.path.join(destination, relative_path), exist_ok=True)
+
+        file_l                                      = []
+        for relative_path, entry in entries_dict.items():
+            path                                    = _os.path.join(destination, relative_path)
+            _os.makedirs(_os.path.dirname(path), exist_ok=True)
+            if entry["kind"] == "link":
+                if _os.path.lexists(path):
+                    _os.remove(path)
+                _os.symlink(entry["target"], path)
+            elif entry["kind"] == "file":
+                file_l.append((path, entry))
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            list(executor.map(lambda f: self._restore_file(*f), file_l))
+
+        for relative_path, entry in sorted(entries_dict.items(), reverse=True):
+            if entry["kind"] == "folder":
+                _os.chmod(_os.path.join(destination, relative_path), entry["mode"])
+        return len(file_l)
+
+    def diff(self, run_id_a, run_id_b):
+        '''
+        Compares two archived runs, reading only their manifests.
+
+        :param str run_id_a: id of the first run, regarded as the "before"
+        :param str run_id_b: id of the second run, regarded as the "after"
+
+        :returns: a list of (relative path, description) pairs, one for each entry that was added, removed or
+            changed between the two runs, sorted by relative path. Empty if the runs have the same content.
+        :rtype: list[tuple[str, str]]
+        '''
+        entries_a_dict                              = self.manifest(run_id_a)["entries"]
+        entries_b_dict                              = self.manifest(run_id_b)["entries"]
+
+        difference_l                                = []
+        for relative_path in sorted(set(entries_a_dict.keys()) | set(entries_b_dict.keys())):
+            entry_a                                 = entries_a_dict.get(relative_path)
+            entry_b                                 = entries_b_dict.get(relative_path)
+            if entry_a is None:
+                difference_l.append((relative_path, f"only in {run_id_b}"))
+            elif entry_b is None:
+                difference_l.append((relative_path, f"only in {run_id_a}"))
+            elif entry_a["kind"] != entry_b["kind"]:
+                difference_l.append((relative_path, f"was a {entry_a['kind']}, is a {entry_b['kind']}"))
+            elif entry_a["kind"] == "link" and entry_a["target"] != entry_b["target"]:
+                difference_l.append((relative_path, f"link target changed from {entry_a['target']} "
+                                                    + f"to {entry_b['target']}"))
+            elif entry_a["kind"] == "file" and entry_a["chunks"] != entry_b["chunks"]:
+                nb_changed                          = len(set(entry_b["chunks"]) - set(entry_a["chunks"]))
+                difference_l.append((relative_path, f"content changed ({entry_a['size']} -> {entry_b['size']} bytes, "
+                                                    + f"{nb_changed} of {len(entry_b['chunks'])} chunks new)"))
+            elif entry_a["mode"] != entry_b["mode"]:
+                difference_l.append((relative_path, f"mode changed from {oct(entry_a['mode'])} "
+                                                    + f"to {oct(entry_b['mode'])}"))
+        return difference_l
+
+    def _store_file(self, path):
+        '''
+        Stores the chunks of the file `path` that are not already in the store.
+
+        :returns: a triple: the size of the file, the list of the hashes of its chunks, and the number of
+            (compressed) bytes added to the store
+        '''
+        size                                        = 0
+        chunk_l                                     = []
+        new_bytes                                   = 0
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(self.CHUNK_SIZE), b""):
+                size                                += len(chunk)
+                digest                              = hashlib.sha256(chunk).hexdigest()
+                chunk_l.append(digest)
+                object_path                         = self._path_to_object(digest)
+                if not _os.path.exists(object_path):
+                    compressed                      = zlib.compress(chunk)
+                    self._write_atomically(object_path, compressed)
+                    new_bytes                       += len(compressed)
+        return size, chunk_l, new_bytes
+
+    def _restore_file(self, path, entry):
+        '''
+        Writes the file `path` from the chunks listed in its manifest `entry`
+        '''
+        # Remove any pre-existing file first, since it might be read-only (as GIT objects are)
+        if _os.path.lexists(path):
+            _os.remove(path)
+        with open(path, "wb") as file:
+            for digest in entry["chunks"]:
+                with open(self._path_to_object(digest), "rb") as object_file:
+                    file.write(zlib.decompress(object_file.read()))
+        _os.chmod(path, entry["mode"])
+
+    def _path_to_object(self, digest):
+        return f"{self.store_folder}/objects/{digest[:2]}/{digest[2:]}"
+
+    def _path_to_manifest(self, run_id):
+        return f"{self.store_folder}/runs/{run_id}.json"
+
+    def _write_atomically(self, path, content):
+        '''
+        Writes `content` to `path` under a temporary name and then renames it, so that concurrent readers and
+        writers never see a partially written file
+        '''
+        _os.makedirs(_os.path.dirname(path), exist_ok=True)
+        temporary_path                              = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(temporary_path, "wb") as file:
+            file.write(content)
+        _os.replace(temporary_path, path)
+
+
+if __name__ == "__main__":
+    # For example, from the `src` folder:
+    #
+    #   python -m conway_test.framework.observability.chassis_run_archive list 8002
+    #   python -m conway_test.framework.observability.chassis_run_archive diff <run id> <run id>
+    #   python -m conway_test.framework.observability.chassis_run_archive checkout <run id> /tmp/8002_run
+    #
+    def main(args):
+        from conway_test.util.chassis_test_statics                         import Chassis_TestStatics
+        from conway_test.util.conway_test_utils                            import ConwayTestUtils
+
+        parser                                      = argparse.ArgumentParser(description="Archive of past test runs")
+        parser.add_argument("--store", default=ConwayTestUtils.work_folder(Chassis_TestStatics.RUN_ARCHIVE_FOLDER),
+                            help="folder of the archive")
+        subparsers                                  = parser.add_subparsers(dest="command", required=True)
+        list_parser                                 = subparsers.add_parser("list", help="list archived runs")
+        list_parser.add_argument("scenario_id", nargs="?", default=None)
+        checkout_parser                             = subparsers.add_parser("checkout", help="recreate an archived run")
+        checkout_parser.add_argument("run_id")
+        checkout_parser.add_argument("destination")
+        checkout_parser.add_argument("--prefix", default=None, help="only check out this relative path")
+        diff_parser                                 = subparsers.add_parser("diff", help="compare two archived runs")
+        diff_parser.add_argument("run_id_a")
+        diff_parser.add_argument("run_id_b")
+        options                                     = parser.parse_args(args[1:])
+
+        run_archive                                 = Chassis_RunArchive(options.store)
+        if options.command == "list":
+            for run_id in run_archive.runs(options.scenario_id):
+                manifest_dict                       = run_archive.manifest(run_id)
+                print(f"{run_id:<32} {manifest_dict['total_bytes']:>14} bytes {manifest_dict['stored_bytes']:>12} new")
+        elif options.command == "checkout":
+            nb_files                                = run_archive.checkout(options.run_id,
+                                                                           _os.path.abspath(options.destination),
+                                                                           prefix = options.prefix)
+            print(f"Checked out {nb_files} files into {options.destination}")
+        else:
+            for relative_path, description in run_archive.diff(options.run_id_a, options.run_id_b):
+                print(f"{relative_path}: {description}")
+
+    main(_sys.argv)
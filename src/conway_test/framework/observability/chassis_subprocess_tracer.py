@@ -0,0 +1,472 @@
+import asyncio
+import contextlib
+import copy
+import os                                                                   as _os
+import subprocess
+import threading
+import time
+
+import yaml
+
+
+class Chassis_SubprocessTracer():
+
+    '''
+    Opt-in tracer used by the :class:`Chassis_TestContext` to find out how many subprocesses (mostly GIT commands)
+    are spawned by the code under test, and how long they take.
+
+    While the tracer is started, every launch of a :class:`subprocess.Popen` is recorded, which covers
+    :func:`subprocess.run`, :func:`subprocess.check_output`, GitPython and :func:`asyncio.create_subprocess_exec`,
+    since all of them create a :class:`subprocess.Popen` under the covers. For each launch the tracer records the
+    command, the working directory, the duration (from launch until the exit status is collected) and, when
+    the output is consumed through ``communicate()``, the number of bytes in standard output and standard error.
+
+    The report saved by :meth:`save` lists:
+
+    * The "hot commands", i.e., the GIT subcommands (or executables, for non-GIT commands) ranked by total time
+    * Read-only GIT queries that were repeated identically (same arguments, same working directory) within a phase,
+      which are candidates for being served from a cache
+
+    Optionally, the tracer can also memoize GIT queries that only read objects and refs (see
+    `GIT_MEMOIZABLE_SUBCOMMANDS`), when made through :func:`subprocess.run` or :func:`subprocess.check_output`
+    with their output captured: an identical query within the same phase, against a repo whose state hasn't
+    changed, is served from memory instead of forking a new process. Nothing is memoized outside phases.
+
+    The state of a repo is given by the modification times and sizes of its ``HEAD``, index, configuration, packed
+    refs and loose refs (see :meth:`_repo_stamp`), which are part of the key of memoized answers. So answers are not
+    reused once the repo changes, however it was changed: by a GIT command, through GitPython, or by writing
+    files. Besides, the memo is cleared at phase boundaries and whenever a GIT command that is not read-only is
+    launched. Queries that read the working tree (e.g., ``git status``) or other repos (e.g., ``git ls-remote``)
+    are never memoized. Launches through GitPython or asyncio are only traced, not memoized.
+
+    Several tracers may be started at the same time (e.g., by nested test contexts): all of them record every
+    launch, and memoized calls are served by the one started last among those that memoize. The :mod:`subprocess`
+    module is patched when the first of them starts and restored when the last of them stops.
+
+    :param bool memoize: whether read-only GIT queries should be memoized.
+    :param int top_n: maximal number of entries in each of the rankings of the report.
+    '''
+    def __init__(self, memoize=False, top_n=20):
+
+        self.memoize                                = memoize
+        self.top_n                                  = top_n
+
+        # List of dictionaries, one per subprocess launched while the tracer was started
+        self.record_l                               = []
+
+        self.cache_hits                             = 0
+        self.cache_misses                           = 0
+
+        self._phase                                 = None
+        self._memo_dict                             = {}
+        self._lock                                  = threading.RLock()
+
+    # Tracers currently started, in the order in which they were started, and the original functions of the
+    # subprocess module while any of them is started
+    #
+    _active_l                                       = []
+    _originals_dict                                 = None
+    _active_lock                                    = threading.Lock()
+
+    GIT_MEMOIZABLE_SUBCOMMANDS                      = ["log", "rev-parse", "rev-list", "show", "cat-file", "ls-tree",
+                                                       "for-each-ref", "merge-base", "show-ref", "name-rev"]
+    '''
+    GIT subcommands that don't change the state of a repo and only read its objects and refs, and so whose output
+    only changes if some other command changes the repo. ``git branch`` and ``git remote`` are also treated as
+    such when they are only listing (see :meth:`is_read_only_git`).
+    '''
+
+    GIT_READ_ONLY_SUBCOMMANDS                       = GIT_MEMOIZABLE_SUBCOMMANDS + ["ls-files", "describe", "status", "diff"]
+    '''
+    GIT subcommands that don't change the state of a repo. Besides the memoizable ones, this includes subcommands
+    that read the working tree, whose output may change without any GIT command being launched.
+    '''
+
+    # Options of ``git branch`` and ``git remote`` that can be used without turning a listing into a mutation
+    GIT_LISTING_OPTIONS                             = ["-a", "--all", "-r", "--remotes", "-l", "--list", "-v", "-vv",
+                                                       "--verbose", "--show-current", "--no-color", "--color=never"]
+
+    # GIT global options that take a separate argument, and which therefore must be skipped to find the subcommand
+    GIT_GLOBAL_OPTIONS_WITH_ARGUMENT                = ["-C", "-c", "--git-dir", "--work-tree", "--namespace"]
+
+    # Files of a GIT folder whose modification times and sizes are part of the state of a repo, besides loose refs
+    GIT_STATE_FILES                                 = ["HEAD", "index", "config", "packed-refs"]
+
+    def start(self):
+        '''
+        Starts intercepting subprocess launches. Calling it again while started has no effect.
+        '''
+        with Chassis_SubprocessTracer._active_lock:
+            if self in Chassis_SubprocessTracer._active_l:
+                return
+            if len(Chassis_SubprocessTracer._active_l) == 0:
+                Chassis_SubprocessTracer._patch()
+            Chassis_SubprocessTracer._active_l.append(self)
+
+    def stop(self):
+        '''
+        Stops intercepting subprocess launches. Once no tracer is started, the original behaviour of the
+        :mod:`subprocess` module is restored. Calling it again while stopped has no effect.
+        '''
+        with Chassis_SubprocessTracer._active_lock:
+            if not self in Chassis_SubprocessTracer._active_l:
+                return
+            Chassis_SubprocessTracer._active_l.remove(self)
+            if len(Chassis_SubprocessTracer._active_l) == 0:
+                Chassis_SubprocessTracer._unpatch()
+
+    def _patch():
+        '''
+        Patches the :mod:`subprocess` module so that launches are reported to all the started tracers
+        '''
+        active_l                                    = Chassis_SubprocessTracer._active_l
+
+        originals_dict                              = {
+            "Popen.__init__":       subprocess.Popen.__init__,
+            "Popen.communicate":    subprocess.Popen.communicate,
+            "Process.communicate":  asyncio.subprocess.Process.communicate,
+            "run":                  subprocess.run,
+        }
+
+        def traced_init(popen, args, *posargs, **kwargs):
+            cwd                                     = kwargs.get("cwd")
+            argv                                    = Chassis_SubprocessTracer._argv(args)
+            record_l                                = [tracer._record_launch(argv, cwd) for tracer in list(active_l)]
+            popen.__dict__["_chassis_trace_records"] = record_l
+            originals_dict["Popen.__init__"](popen, args, *posargs, **kwargs)
+
+        def traced_communicate(popen, *args, **kwargs):
+            stdout, stderr                          = originals_dict["Popen.communicate"](popen, *args, **kwargs)
+            Chassis_SubprocessTracer._record_output(popen.__dict__.get("_chassis_trace_records"), stdout, stderr)
+            return stdout, stderr
+
+        async def traced_async_communicate(process, *args, **kwargs):
+            stdout, stderr                          = await originals_dict["Process.communicate"](process, *args, **kwargs)
+            popen                                   = process._transport.get_extra_info("subprocess")
+            Chassis_SubprocessTracer._record_output(popen.__dict__.get("_chassis_trace_records"), stdout, stderr)
+            return stdout, stderr
+
+        def memoized_run(*args, **kwargs):
+            memoizing_l                             = [tracer for tracer in list(active_l) if tracer.memoize]
+            if len(memoizing_l) == 0:
+                return originals_dict["run"](*args, **kwargs)
+            return memoizing_l[-1]._memoized_call(originals_dict["run"], args, kwargs)
+
+        subprocess.Popen.__init__                   = traced_init
+        subprocess.Popen.communicate                = traced_communicate
+        subprocess.Popen.returncode                 = property(_get_returncode, _set_returncode)
+        asyncio.subprocess.Process.communicate      = traced_async_communicate
+        # GOTCHA: subprocess.check_output is implemented by calling subprocess.run, so it gets memoized too
+        subprocess.run                              = memoized_run
+
+        Chassis_SubprocessTracer._originals_dict    = originals_dict
+
+    def _unpatch():
+        '''
+        Restores the functions of the :mod:`subprocess` module replaced by :meth:`_patch`
+        '''
+        O                                           = Chassis_SubprocessTracer._originals_dict
+
+        subprocess.Popen.__init__                   = O["Popen.__init__"]
+        subprocess.Popen.communicate                = O["Popen.communicate"]
+        del subprocess.Popen.returncode
+        asyncio.subprocess.Process.communicate      = O["Process.communicate"]
+        subprocess.run                              = O["run"]
+
+        Chassis_SubprocessTracer._originals_dict    = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''
+        Context manager that attributes all subprocesses launched by the code it wraps to the phase `name`.
+        The memo of read-only GIT queries is cleared when the phase starts and when it ends.
+
+        :param str name: name of the phase, e.g., "create_repo_report"
+        '''
+        with self._lock:
+            previous_phase                          = self._phase
+            self._phase                             = name
+            self._memo_dict                         = {}
+        try:
+            yield self
+        finally:
+            with self._lock:
+                self._phase                         = previous_phase
+                self._memo_dict                     = {}
+
+    def is_read_only_git(self, argv, memoizable_only=False):
+        '''
+        Returns True if `argv` is a GIT command that doesn't change the state of any repo.
+
+        :param list[str] argv: command line of a subprocess, with the executable as the first element.
+        :param bool memoizable_only: if True, only GIT commands that read nothing but objects and refs count as
+            read-only, i.e., those whose answers can be memoized.
+        :rtype: bool
+        '''
+        subcommand, subcommand_args                 = self._git_subcommand(argv)
+        read_only_l                                 = self.GIT_MEMOIZABLE_SUBCOMMANDS if memoizable_only \
+                                                        else self.GIT_READ_ONLY_SUBCOMMANDS
+        if subcommand in read_only_l:
+            return True
+        if subcommand in ["branch", "remote"]:
+            return all(arg in self.GIT_LISTING_OPTIONS for arg in subcommand_args)
+        return False
+
+    def report(self):
+        '''
+        Returns a dictionary summarizing all subprocesses recorded so far.
+        '''
+        with self._lock:
+            record_l                                = list(self.record_l)
+
+        hot_dict                                    = {}
+        phases_dict                                 = {}
+        repeated_dict                               = {}
+        for record in record_l:
+            seconds                                 = record["seconds"] or 0.0
+            output_bytes                            = record["output_bytes"] or 0
+
+            hot                                     = hot_dict.setdefault(record["command_kind"],
+                                                            {"command": record["command_kind"], "count": 0,
+                                                             "total_seconds": 0.0, "output_kib": 0.0})
+            hot["count"]                            += 1
+            hot["total_seconds"]                    += seconds
+            hot["output_kib"]                       += output_bytes / 1024
+
+            phase                                   = phases_dict.setdefault(record["phase"] or "(outside phases)",
+                                                            {"processes": 0, "total_seconds": 0.0})
+            phase["processes"]                      += 1
+            phase["total_seconds"]                  += seconds
+
+            if record["read_only_git"]:
+                key                                 = (record["phase"], record["cwd"], record["command"])
+                repeated                            = repeated_dict.setdefault(key,
+                                                            {"command": record["command"], "cwd": record["cwd"],
+                                                             "phase": record["phase"], "count": 0,
+                                                             "total_seconds": 0.0})
+                repeated["count"]                   += 1
+                repeated["total_seconds"]           += seconds
+
+        hot_l                                       = sorted(hot_dict.values(),
+                                                             key=lambda h: h["total_seconds"], reverse=True)
+        repeated_l                                  = sorted([r for r in repeated_dict.values() if r["count"] > 1],
+                                                             key=lambda r: r["total_seconds"], reverse=True)
+        for entry in hot_l + repeated_l + list(phases_dict.values()):
+            for field in ["total_seconds", "output_kib"]:
+                if field in entry:
+                    entry[field]                    = round(entry[field], 3)
+
+        return {
+            "summary": {
+                "processes":                len(record_l),
+                "total_seconds":            round(sum(r["seconds"] or 0.0 for r in record_l), 3),
+                "repeated_read_only_git":   sum(r["count"] - 1 for r in repeated_l),
+                "memo_hits":                self.cache_hits,
+                "memo_misses":              self.cache_misses,
+            },
+            "phases":                       phases_dict,
+            "hot_commands":                 hot_l[:self.top_n],
+            "repeated_read_only_git":       repeated_l[:self.top_n],
+        }
+
+    def save(self, path):
+        '''
+        Saves the report of all subprocesses recorded so far as a YAML file.
+
+        :param str path: absolute path for the YAML file to create. Parent folders are created if needed.
+        '''
+        _os.makedirs(_os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            yaml.safe_dump(self.report(), file, sort_keys=False)
+
+    def _record_launch(self, argv, cwd):
+        '''
+        Records that a subprocess is being launched, and returns the (mutable) record for it, so that its
+        duration and output size can be filled in later
+        '''
+        read_only_git                               = self.is_read_only_git(argv)
+        subcommand, _                               = self._git_subcommand(argv)
+        record                                      = {
+            "command":          " ".join(argv),
+            "command_kind":     f"git {subcommand}" if subcommand is not None else _os.path.basename(argv[0]),
+            "cwd":              str(cwd) if cwd is not None else _os.getcwd(),
+            "phase":            self._phase,
+            "read_only_git":    read_only_git,
+            "start":            time.perf_counter(),
+            "seconds":          None,
+            "output_bytes":     None,
+        }
+        with self._lock:
+            self.record_l.append(record)
+            # A command that might modify some repo invalidates previously memoized answers
+            if subcommand is not None and not read_only_git:
+                self._memo_dict                     = {}
+        return record
+
+    def _record_output(record_l, stdout, stderr):
+        for record in record_l or []:
+            record["output_bytes"]                  = sum(len(out) for out in [stdout, stderr] if out is not None)
+
+    def _memoized_call(self, original, args, kwargs):
+        '''
+        Serves a call to :func:`subprocess.run` from the memo if it is a memoizable GIT query that was already
+        answered in the current phase. Otherwise delegates to the `original` function, memoizing the answer
+        if it succeeded.
+
+        Only calls made within a phase, with both standard output and standard error captured, are memoized, so that
+        serving a call from the memo never hides output that the caller expected to go to the terminal. The
+        state of the repo, as given by :meth:`_repo_stamp`, is part of the key, so answers are not reused once the
+        repo changes.
+        '''
+        argv                                        = Chassis_SubprocessTracer._argv(args[0] if args else kwargs.get("args"))
+        memoizable                                  = self._phase is not None \
+                                                        and self.is_read_only_git(argv, memoizable_only=True) \
+                                                        and "input" not in kwargs and kwargs.get("stdin") is None \
+                                                        and self._is_output_captured(kwargs)
+        if not memoizable:
+            return original(*args, **kwargs)
+
+        cwd                                         = _os.path.abspath(_os.fsdecode(kwargs.get("cwd") or _os.getcwd()))
+        repo_stamp                                  = self._repo_stamp(argv, cwd, kwargs.get("env"))
+        if repo_stamp is None:
+            return original(*args, **kwargs)
+
+        options                                     = sorted((k, repr(v)) for k, v in kwargs.items() if k != "args")
+        key                                         = (tuple(argv), cwd, tuple(options), repo_stamp)
+        with self._lock:
+            if key in self._memo_dict:
+                self.cache_hits                     += 1
+                return copy.copy(self._memo_dict[key])
+
+        result                                      = original(*args, **kwargs)
+        with self._lock:
+            self.cache_misses                       += 1
+            if result.returncode == 0:
+                self._memo_dict[key]                = copy.copy(result)
+        return result
+
+    def _is_output_captured(self, kwargs):
+        '''
+        Returns True if a call to :func:`subprocess.run` with keyword arguments `kwargs` doesn't let the subprocess
+        write to the terminal
+        '''
+        if kwargs.get("capture_output"):
+            return True
+        return kwargs.get("stdout") in [subprocess.PIPE, subprocess.DEVNULL] \
+                and kwargs.get("stderr") in [subprocess.PIPE, subprocess.STDOUT, subprocess.DEVNULL]
+
+    def _repo_stamp(self, argv, cwd, env):
+        '''
+        Returns a tuple that changes whenever the repo in which the GIT command `argv` runs changes its ``HEAD``,
+        index, configuration or refs, however they are changed. Returns None if the repo can't be found, in which
+        case the command should not be memoized.
+
+        :param list[str] argv: command line of a GIT command
+        :param str cwd: absolute path to the working directory of the command
+        :param dict env: environment of the command, or None if it inherits ours
+        '''
+        if "GIT_DIR" in (env if env is not None else _os.environ):
+            return None
+        folder                                      = cwd
+        git_dir                                     = None
+        idx                                         = 1
+        while idx + 1 < len(argv) and argv[idx].startswith("-"):
+            if argv[idx] == "-C":
+                folder                              = _os.path.join(folder, argv[idx + 1])
+            elif argv[idx] == "--git-dir":
+                git_dir                             = _os.path.join(folder, argv[idx + 1])
+            idx                                     += 2 if argv[idx] in self.GIT_GLOBAL_OPTIONS_WITH_ARGUMENT else 1
+        if git_dir is None:
+            git_dir                                 = self._find_git_dir(folder)
+        if git_dir is None:
+            return None
+
+        # In linked worktrees, refs live in the common GIT folder, while HEAD and the index are in the worktree's own
+        folder_l                                    = [git_dir]
+        if _os.path.isfile(f"{git_dir}/commondir"):
+            with open(f"{git_dir}/commondir") as file:
+                folder_l.append(_os.path.normpath(_os.path.join(git_dir, file.read().strip())))
+
+        stamp_l                                     = []
+        for folder in folder_l:
+            for name in self.GIT_STATE_FILES:
+                stamp_l.append(self._file_stamp(f"{folder}/{name}"))
+            for parent, _, file_l in _os.walk(f"{folder}/refs"):
+                stamp_l.append(self._file_stamp(parent))
+                stamp_l.extend(self._file_stamp(f"{parent}/{name}") for name in file_l)
+        return tuple(stamp_l)
+
+    def _find_git_dir(self, folder):
+        '''
+        Returns the GIT folder of the repo that contains `folder`, or None if there is none
+        '''
+        folder                                      = _os.path.abspath(folder)
+        while True:
+            dot_git                                 = f"{folder}/.git"
+            if _os.path.isdir(dot_git):
+                return dot_git
+            if _os.path.isfile(dot_git):
+                # Linked worktrees and submodules have a file pointing to their GIT folder
+                with open(dot_git) as file:
+                    content                         = file.read().strip()
+                if not content.startswith("gitdir:"):
+                    return None
+                return _os.path.normpath(_os.path.join(folder, content[len("gitdir:"):].strip()))
+            if _os.path.isfile(f"{folder}/HEAD") and _os.path.isdir(f"{folder}/refs"):
+                # A bare repo
+                return folder
+            parent                                  = _os.path.dirname(folder)
+            if parent == folder:
+                return None
+            folder                                  = parent
+
+    def _file_stamp(self, path):
+        '''
+        Returns the path, modification time and size of `path`, the latter two None if it doesn't exist
+        '''
+        try:
+            stat                                    = _os.stat(path)
+        except FileNotFoundError:
+            return (path, None, None)
+        return (path, stat.st_mtime_ns, stat.st_size)
+
+    def _argv(args):
+        '''
+        Returns the command line `args` given to :class:`subprocess.Popen` as a list of strings
+        '''
+        if isinstance(args, (str, bytes, _os.PathLike)):
+            return _os.fsdecode(args).split()
+        return [_os.fsdecode(a) if isinstance(a, (bytes, _os.PathLike)) else str(a) for a in args]
+
+    def _git_subcommand(self, argv):
+        '''
+        Returns a pair: the GIT subcommand in `argv` (e.g., "log") and the list of arguments that follow it. If `argv`
+        is not a GIT command, returns (None, []).
+        '''
+        if not argv or _os.path.basename(argv[0]) not in ["git", "git.exe"]:
+            return None, []
+        idx                                         = 1
+        while idx < len(argv) and argv[idx].startswith("-"):
+            idx                                     += 2 if argv[idx] in self.GIT_GLOBAL_OPTIONS_WITH_ARGUMENT else 1
+        if idx >= len(argv):
+            return None, []
+        return argv[idx], argv[idx + 1:]
+
+
+# GOTCHA
+#
+# While the tracer is started, `returncode` is turned into a property of subprocess.Popen so that we notice the moment
+# in which the exit status of a subprocess is collected, no matter who collects it (Popen.wait, Popen.poll, or the
+# asyncio child watcher, which sets `returncode` directly). The value itself is still kept in the instance's
+# __dict__, so instances created before or after the tracer was started behave as usual.
+#
+def _get_returncode(popen):
+    return popen.__dict__.get("returncode")
+
+def _set_returncode(popen, value):
+    popen.__dict__["returncode"]                    = value
+    if value is None:
+        return
+    for record in popen.__dict__.get("_chassis_trace_records", []):
+        if record["seconds"] is None:
+            record["seconds"]                       = time.perf_counter() - record["start"]
@@ -1,3 +1,8 @@
+import os                                                               as _os
+import shutil
+import toml
+import uuid
+
 from conway.database.single_root_data_hub                               import RelativeDataHubHandle, GitHubDataHubHandle
 
 from conway_ops.database.repos_data_hub                                 import Repos_DataHub
@@ -5,6 +10,7 @@ from conway_ops.onboarding.user_profile                                 import U
 
 from conway_acceptance.scenario_foundry.scenario_manifest               import ScenarioManifest
 
+from conway_test.framework.test_database.chassis_seed_pack              import Chassis_SeedPack
 from conway_test.util.chassis_test_statics                              import Chassis_TestStatics
 from conway_test.util.conway_test_utils                                 import ConwayTestUtils
 
@@ -23,6 +29,11 @@ class OperatorScenarioManifest(ScenarioManifest):
     credentials, if any. 
     Remote repos may be located in either the local file system or on GitHub.
 
+    Seeds may be stored either as loose folders (e.g., ``SEED@T0``) or packed (e.g., ``SEED@T0.seedpack``, as
+    created by :class:`Chassis_SeedPack`). A packed seed is extracted once into a folder outside the scenarios repo,
+    which is what `path_to_seed` returns, so the :class:`Operator_TestDatabase` populates its data hubs from it
+    just as from a loose folder.
+
     @param scenarios_root_folder A string representing the absolute path to a folder which serves as the root
         for all test databases across all test scenarios. The test database for which this is a specification
         will be created in `scenarios_root_folder/scenario/`
@@ -31,13 +42,170 @@ class OperatorScenarioManifest(ScenarioManifest):
         a specification. A YAML file that maps such numerical ids to the classname of the code that implements
         a test scenario can be found in `scenarios_root_folder/ScenarioIds.yaml`
 
+    @param local_remote A bool, stating whether remote repos in GitHub should be virtualized as local bare repos.
+        If None, it is determined by whether the environment variable given by Chassis_TestStatics.LOCAL_REMOTE
+        is set. It has no effect on scenarios whose profile already has remote repos in the local file system.
+        Refer to the documentation of `_virtualize_remote` for details.
+
     '''
-    def __init__(self, scenarios_root_folder, scenario_id):
+    def __init__(self, scenarios_root_folder, scenario_id, local_remote=None):
         super().__init__(scenarios_root_folder, scenario_id)
 
+        if local_remote is None:
+            local_remote                    = ConwayTestUtils.is_env_flag_set(Chassis_TestStatics.LOCAL_REMOTE)
+
+        self._sdlc_root                     = f"{self.path_to_seed()}/sdlc_root"
+        self._local_remote                  = f"{ConwayTestUtils.work_folder(Chassis_TestStatics.LOCAL_REMOTES_FOLDER)}" \
+                                                + f"/{scenario_id}"
+        self.profile                        = UserProfile(self._profile_path(self._sdlc_root))
+
+        # True if the remote repos of the profile are in GitHub but this manifest is set up to use
+        # local bare repos in their place
+        #
+        self.virtualized_remote             = False
+        if local_remote and not self.profile.REMOTE_IS_LOCAL():
+            self._virtualize_remote()
+
+    def path_to_seed(self, seeding_round=0):
+        '''
+        Overwrites parent so that, if the seed for `seeding_round` is packed, it returns the folder into which the
+        packed seed has been extracted. Extraction only happens the first time, or if the seed pack changed since it
+        was last extracted.
+
+        Each version of a seed pack (as given by its size and modification time) is extracted into its own folder,
+        under a temporary name that is renamed into place once complete. So concurrent runs never see a partially
+        extracted seed, and if two of them extract the same version, the first one to finish wins.
+
+        @param seeding_round An int, designating the round of seeding for which we seek the path.
+        '''
+        loose_seed                          = super().path_to_seed(seeding_round)
+        seed_pack                           = self.seed_pack(seeding_round)
+        if seed_pack is None:
+            return loose_seed
+
+        unpacked_parent                     = ConwayTestUtils.work_folder(Chassis_TestStatics.UNPACKED_SEEDS_FOLDER) \
+                                                + "/" + _os.path.relpath(_os.path.dirname(loose_seed),
+                                                                         self.scenarios_root_folder)
+        seed_name                           = _os.path.basename(loose_seed)
+        pack_stat                           = _os.stat(seed_pack.pack_path)
+        version                             = f"{pack_stat.st_size}-{pack_stat.st_mtime_ns}"
+        unpacked_seed                       = f"{unpacked_parent}/{seed_name}.{version}"
+        if _os.path.isdir(unpacked_seed):
+            return unpacked_seed
+
+        temp_folder                         = f"{unpacked_parent}/{seed_name}.{uuid.uuid4().hex}.tmp"
+        seed_pack.extract("", temp_folder)
+        try:
+            _os.rename(temp_folder, unpacked_seed)
+        except OSError:
+            # Another run extracted the same version first
+            if not _os.path.isdir(unpacked_seed):
+                raise
+            shutil.rmtree(temp_folder, ignore_errors=True)
+
+        # Forget earlier versions, which nothing uses once the seed pack changed
+        for name in _os.listdir(unpacked_parent):
+            if name.startswith(f"{seed_name}.") and not name.endswith(".tmp") and name != _os.path.basename(unpacked_seed):
+                shutil.rmtree(f"{unpacked_parent}/{name}", ignore_errors=True)
+        return unpacked_seed
+
+    def seed_pack(self, seeding_round=0):
+        '''
+        Returns a Chassis_SeedPack for the seed for `seeding_round` if it is packed, i.e., if there is no loose folder
+        for the seed but there is a seed pack instead. Otherwise returns None.
+
+        @param seeding_round An int, designating the round of seeding for which we seek the seed pack.
+        '''
+        loose_seed                          = super().path_to_seed(seeding_round)
+        pack_path                           = loose_seed + Chassis_SeedPack.SUFFIX
+        if _os.path.isdir(loose_seed) or not _os.path.exists(pack_path):
+            return None
+        return Chassis_SeedPack(pack_path)
+
+    def _profile_path(self, sdlc_root):
+        '''
+        Returns the path to the TOML file for the test user profile under the given `sdlc_root`
+        '''
         profile_name                        = Chassis_TestStatics.TEST_USER_PROFILE_NAME
-        profile_path                        = f"{self.scenarios_root_folder}/{scenario_id}/SEED@T0/sdlc_root/sdlc.profiles/{profile_name}/profile.toml" 
-        self.profile                        = UserProfile(profile_path)
+        return f"{sdlc_root}/sdlc.profiles/{profile_name}/profile.toml"
+
+    def path_to_sdlc_root(self):
+        '''
+        Returns the path to the SDLC root folder that test cases should use to find user profiles. Normally this
+        is the ``sdlc_root`` folder in the seed, but if the remote repos have been virtualized it is a generated
+        copy of it whose profile points to the local bare repos.
+        '''
+        return self._sdlc_root
+
+    def path_to_local_remote(self):
+        '''
+        Returns the folder under which this scenario's GitHub remote repos are virtualized when in "local remote"
+        mode. It is outside the scenarios repo, so that generated repos don't pollute it.
+        '''
+        return self._local_remote
+
+    def _virtualize_remote(self):
+        '''
+        Sets up this manifest so that the scenario runs against local bare repos instead of GitHub.
+
+        The profile's remote root, which is something like
+
+            https://{OWNER}@github.com/{OWNER}
+
+        is replaced by the local folder `self.path_to_local_remote()/remotes/{OWNER}`, so that a GitHub repo
+        `{OWNER}/{REPO}` corresponds to the local bare repo `remotes/{OWNER}/{REPO}`. 
+        
+        Since the code under test reads the profile from the file system, the replacement is done on a
+        copy of the seed's ``sdlc_root`` folder, kept in `self.path_to_local_remote()/sdlc_root`, which
+        becomes the value returned by `self.path_to_sdlc_root()`. The copy of the profile is parsed and every
+        setting whose value is the remote root is replaced, so that the remote root appearing elsewhere (e.g.,
+        as part of another setting) is left alone. The bare repos themselves are created by the test cases,
+        just as they would create GitHub repos.
+        '''
+        github_profile                      = self.profile
+        owner                               = github_profile.GH_ORGANIZATION
+        local_remote                        = self.path_to_local_remote()
+
+        self._remotes_parent                = f"{local_remote}/remotes"
+        self._remote_owner                  = owner
+        remote_root                         = f"{self._remotes_parent}/{owner}"
+
+        virtual_sdlc_root                   = f"{local_remote}/sdlc_root"
+        if _os.path.exists(virtual_sdlc_root):
+            shutil.rmtree(virtual_sdlc_root)
+        shutil.copytree(self._sdlc_root, virtual_sdlc_root)
+        _os.makedirs(remote_root, exist_ok=True)
+
+        profile_path                        = self._profile_path(virtual_sdlc_root)
+        profile_dict                        = toml.load(profile_path)
+        if self._replace_setting(profile_dict, github_profile.REMOTE_ROOT, remote_root) == 0:
+            raise ValueError(f"Can't virtualize the remote of profile '{profile_path}': it has no setting whose "
+                             + f"value is the remote root '{github_profile.REMOTE_ROOT}'")
+        with open(profile_path, "w") as file:
+            toml.dump(profile_dict, file)
+
+        local_profile                       = UserProfile(profile_path)
+        if not local_profile.REMOTE_IS_LOCAL():
+            raise ValueError(f"Virtualized the remote of profile '{profile_path}' as '{remote_root}', but the "
+                             + "profile still doesn't regard its remote as local")
+
+        self._sdlc_root                     = virtual_sdlc_root
+        self.profile                        = local_profile
+        self.virtualized_remote             = True
+
+    def _replace_setting(self, settings_dict, old_value, new_value):
+        '''
+        Replaces `old_value` by `new_value` in every setting of the parsed TOML `settings_dict` whose value is
+        exactly `old_value`, including settings in nested tables. Returns the number of settings replaced.
+        '''
+        nb_replaced                         = 0
+        for key, value in settings_dict.items():
+            if isinstance(value, dict):
+                nb_replaced                 += self._replace_setting(value, old_value, new_value)
+            elif value == old_value:
+                settings_dict[key]          = new_value
+                nb_replaced                 += 1
+        return nb_replaced
 
     def get_data_hubs(self):
         '''
@@ -50,7 +218,12 @@ class OperatorScenarioManifest(ScenarioManifest):
                                                                                 self.path_to_actuals(), 
                                                                                 Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER))
 
-        if self.profile.REMOTE_IS_LOCAL():
+        if self.virtualized_remote:
+            remote_repos_hub                = Repos_DataHub(name        = Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER,
+                                                            hub_handle  = RelativeDataHubHandle(
+                                                                                self._remotes_parent,
+                                                                                self._remote_owner))
+        elif self.profile.REMOTE_IS_LOCAL():
             remote_repos_hub                = Repos_DataHub(name        = Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER,
                                                             hub_handle  = RelativeDataHubHandle(
                                                                                 self.path_to_actuals(), 
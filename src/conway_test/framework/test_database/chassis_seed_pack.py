@@ -0,0 +1,222 @@
+import mmap
+import os                                                                   as _os
+import stat                                                                 as _stat
+import struct
+import sys                                                                  as _sys
+import zlib
+
+
+class Chassis_SeedPack():
+
+    '''
+    Packed representation of a seed folder (such as ``SEED@T0``), used so that scenarios whose seeds contain huge
+    numbers of tiny files (e.g., GIT repos) can be stored, checked out and backed up as two files instead of as
+    loose trees.
+
+    A seed pack consists of:
+
+    * A data file (conventionally named like the seed folder plus the suffix in `SUFFIX`, e.g., ``SEED@T0.seedpack``),
+      with the content of each file of the seed compressed independently with zlib, one after the other, in order
+      of their relative paths. Compressing each file on its own is what allows random access.
+    * An index file, with the same name plus ``.idx``, with one fixed-size entry per file or folder, sorted by
+      relative path, followed by a blob with the UTF-8 encoded relative paths. Each entry has the offset and length
+      of its path in the blob, the file's mode, and the offset, compressed size and size of its content in the data
+      file.
+
+    The index is memory-mapped and searched with a binary search, so looking up a folder (e.g., a data hub) doesn't
+    require reading the whole index. Since entries are sorted by path, all the files under a folder are contiguous
+    in the data file, so extracting a folder is a single sequential read, streamed straight to the destination.
+
+    :param str pack_path: absolute path to the data file of a seed pack. The index file must be next to it.
+    '''
+    def __init__(self, pack_path):
+        self.pack_path                              = pack_path
+
+        with open(pack_path + self.INDEX_SUFFIX, "rb") as file:
+            self._index                             = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, self.nb_entries                      = struct.unpack_from(self.HEADER_FORMAT, self._index, 0)
+        if magic != self.INDEX_MAGIC:
+            raise ValueError(f"'{pack_path}{self.INDEX_SUFFIX}' is not the index of a seed pack")
+        self._names_start                           = struct.calcsize(self.HEADER_FORMAT) \
+                                                        + self.nb_entries * struct.calcsize(self.ENTRY_FORMAT)
+
+    SUFFIX                                          = ".seedpack"
+    INDEX_SUFFIX                                    = ".idx"
+
+    DATA_MAGIC                                      = b"CSEEDPK1"
+    INDEX_MAGIC                                     = b"CSEEDIX1"
+
+    # Index header: magic, number of entries
+    HEADER_FORMAT                                   = "<8sQ"
+
+    # Index entry: path offset in the blob, path length, mode, content offset, compressed size, size
+    ENTRY_FORMAT                                    = "<QIIQQQ"
+
+    # Number of bytes read at a time from the data file when extracting
+    READ_SIZE                                       = 1024 * 1024
+
+    def pack(seed_folder, pack_path):
+        '''
+        Creates a seed pack at `pack_path` (and its index next to it) with the content of `seed_folder`.
+
+        :param str seed_folder: absolute path to a loose seed folder, e.g., ``.../8002/SEED@T0``
+        :param str pack_path: absolute path of the data file of the seed pack to create, e.g.,
+            ``.../8002/SEED@T0.seedpack``
+        '''
+        relative_path_l                             = []
+        for parent, folder_l, file_l in _os.walk(seed_folder):
+            relative_parent                         = _os.path.relpath(parent, seed_folder).replace(_os.sep, "/")
+            for name in folder_l + file_l:
+                relative_path_l.append(name if relative_parent == "." else f"{relative_parent}/{name}")
+        relative_path_l.sort(key=lambda p: p.encode("utf-8"))
+
+        entry_l                                     = []
+        names_blob                                  = bytearray()
+        with open(pack_path, "wb") as data_file:
+            data_file.write(Chassis_SeedPack.DATA_MAGIC)
+            for relative_path in relative_path_l:
+                path                                = _os.path.join(seed_folder, relative_path)
+                mode                                = _os.lstat(path).st_mode
+                offset                              = data_file.tell()
+                size                                = 0
+                if _stat.S_ISLNK(mode):
+                    content                         = _os.readlink(path).encode("utf-8")
+                    size                            = len(content)
+                    data_file.write(zlib.compress(content))
+                elif _stat.S_ISREG(mode):
+                    compressor                      = zlib.compressobj()
+                    with open(path, "rb") as file:
+                        for chunk in iter(lambda: file.read(Chassis_SeedPack.READ_SIZE), b""):
+                            size                    += len(chunk)
+                            data_file.write(compressor.compress(chunk))
+                    data_file.write(compressor.flush())
+                name                                = relative_path.encode("utf-8")
+                entry_l.append((len(names_blob), len(name), mode, offset, data_file.tell() - offset, size))
+                names_blob                          += name
+
+        with open(pack_path + Chassis_SeedPack.INDEX_SUFFIX, "wb") as index_file:
+            index_file.write(struct.pack(Chassis_SeedPack.HEADER_FORMAT, Chassis_SeedPack.INDEX_MAGIC, len(entry_l)))
+            for entry in entry_l:
+                index_file.write(struct.pack(Chassis_SeedPack.ENTRY_FORMAT, *entry))
+            index_file.write(names_blob)
+
+    def extract(self, folder, destination, exclude=None):
+        '''
+        Extracts all the files and folders under the relative path `folder` of the seed pack into the `destination`
+        folder, which is created if needed. Files that already exist in `destination` are overwritten.
+
+        :param str folder: relative path of a folder in the seed, e.g., "bundled_repos_local". If it is "", the
+            whole seed is extracted.
+        :param str destination: absolute path of the folder that should end up with the content of `folder`
+        :param list[str] exclude: relative paths of folders (relative to `folder`) that should not be extracted.
+            If None, nothing is excluded.
+
+        :returns: the number of files extracted
+        :rtype: int
+        '''
+        start, end                                  = self._range(folder)
+        prefix_length                               = len(folder) + 1 if folder != "" else 0
+        exclude                                     = exclude or []
+        exclude_prefixes                            = [e + "/" for e in exclude]
+
+        _os.makedirs(destination, exist_ok=True)
+        nb_files                                    = 0
+        with open(self.pack_path, "rb") as data_file:
+            for idx in range(start, end):
+                name, mode, offset, compressed_size, size = self._entry(idx)
+                relative_path                       = name[prefix_length:]
+                if relative_path in exclude or any(relative_path.startswith(p) for p in exclude_prefixes):
+                    continue
+                path                                = _os.path.join(destination, relative_path)
+                if _stat.S_ISDIR(mode):
+                    _os.makedirs(path, exist_ok=True)
+                elif _stat.S_ISLNK(mode):
+                    data_file.seek(offset)
+                    if _os.path.lexists(path):
+                        _os.remove(path)
+                    _os.symlink(zlib.decompress(data_file.read(compressed_size)).decode("utf-8"), path)
+                else:
+                    # Remove any pre-existing file first, since it might be read-only (as GIT objects are)
+                    if _os.path.lexists(path):
+                        _os.remove(path)
+                    data_file.seek(offset)
+                    self._stream(data_file, compressed_size, path)
+                    _os.chmod(path, _stat.S_IMODE(mode))
+                    nb_files                        += 1
+        return nb_files
+
+    def _stream(self, data_file, compressed_size, path):
+        '''
+        Decompresses `compressed_size` bytes from the current position of `data_file` into the file `path`,
+        without holding the whole content in memory
+        '''
+        decompressor                                = zlib.decompressobj()
+        remaining                                   = compressed_size
+        with open(path, "wb") as file:
+            while remaining > 0:
+                chunk                               = data_file.read(min(self.READ_SIZE, remaining))
+                if len(chunk) == 0:
+                    raise ValueError(f"Seed pack '{self.pack_path}' is truncated")
+                remaining                           -= len(chunk)
+                file.write(decompressor.decompress(chunk))
+            file.write(decompressor.flush())
+
+    def _entry(self, idx):
+        '''
+        Returns the `idx`-th entry of the index, as a tuple (relative path, mode, offset, compressed size, size)
+        '''
+        entry_offset                                = struct.calcsize(self.HEADER_FORMAT) + idx * struct.calcsize(self.ENTRY_FORMAT)
+        name_offset, name_length, mode, offset, compressed_size, size \
+                                                    = struct.unpack_from(self.ENTRY_FORMAT, self._index, entry_offset)
+        start                                       = self._names_start + name_offset
+        name                                        = self._index[start:start + name_length].decode("utf-8")
+        return name, mode, offset, compressed_size, size
+
+    def _name_bytes(self, idx):
+        entry_offset                                = struct.calcsize(self.HEADER_FORMAT) + idx * struct.calcsize(self.ENTRY_FORMAT)
+        name_offset, name_length                    = struct.unpack_from("<QI", self._index, entry_offset)
+        start                                       = self._names_start + name_offset
+        return self._index[start:start + name_length]
+
+    def _range(self, folder):
+        '''
+        Returns a pair (start, end) such that the index entries for everything under the relative path `folder`
+        are those in positions start, start + 1, ..., end - 1
+        '''
+        if folder == "":
+            return 0, self.nb_entries
+        prefix                                      = (folder + "/").encode("utf-8")
+        start                                       = self._lower_bound(prefix)
+        # "0" is the byte that comes right after "/", so this is the first path that doesn't start with `prefix`
+        end                                         = self._lower_bound(prefix[:-1] + b"0")
+        return start, end
+
+    def _lower_bound(self, name):
+        '''
+        Returns the position of the first index entry whose path is not less than `name` (as bytes)
+        '''
+        low, high                                   = 0, self.nb_entries
+        while low < high:
+            middle                                  = (low + high) // 2
+            if self._name_bytes(middle) < name:
+                low                                 = middle + 1
+            else:
+                high                                = middle
+        return low
+
+
+if __name__ == "__main__":
+    # Packs each seed folder given as an argument, e.g.:
+    #
+    #   python -m conway_test.framework.test_database.chassis_seed_pack $SCENARIOS_REPO/8002/SEED@T0
+    #
+    # creates $SCENARIOS_REPO/8002/SEED@T0.seedpack and $SCENARIOS_REPO/8002/SEED@T0.seedpack.idx
+    #
+    def main(args):
+        for seed_folder in args[1:]:
+            seed_folder                             = _os.path.abspath(seed_folder).rstrip("/")
+            Chassis_SeedPack.pack(seed_folder, seed_folder + Chassis_SeedPack.SUFFIX)
+            print(f"Packed {seed_folder} into {seed_folder + Chassis_SeedPack.SUFFIX}")
+
+    main(_sys.argv)
@@ -0,0 +1,125 @@
+import hashlib
+import os                                                                   as _os
+import shutil
+import threading
+import uuid
+
+
+class Chassis_SeedTemplates():
+
+    '''
+    Store of pre-seeded data hubs, used so that populating a test database from a seed folder is a plain copy
+    of the result of a previous seeding, instead of a new seeding.
+
+    The first time a data hub is populated from a given seed, the resulting content of the hub is copied into a
+    template. Later populations of the same hub from the same seed copy the template into the hub instead. Templates
+    are copied rather than hard-linked, since the code under test may modify the files of a test database in place,
+    which would corrupt a hard-linked template.
+
+    A template is identified by the path of the seed folder and the path of the hub, since seeding may record the
+    latter (e.g., in the configuration of GIT repos). It is only used while the seed is unchanged, as determined by
+    a fingerprint of the relative paths, sizes and modification times of all files in the seed.
+
+    Templates are kept on disk, so they survive the process, but they matter most for the harness daemon, where they
+    are turned on by default. Use :meth:`for_templates_folder` to get a store rather than the constructor.
+
+    :param str templates_folder: absolute path to the folder in which templates are kept. It is created if needed.
+    '''
+    def __init__(self, templates_folder):
+        self.templates_folder                       = templates_folder
+
+        _os.makedirs(templates_folder, exist_ok=True)
+
+    # Maps the path of each templates folder to the store for it
+    _stores_dict                                    = {}
+    _stores_lock                                    = threading.Lock()
+
+    FINGERPRINT_FILE                                = "fingerprint"
+    CONTENT_FOLDER                                  = "content"
+
+    def for_templates_folder(templates_folder):
+        '''
+        Returns the store for `templates_folder`, creating it the first time it is needed in this process.
+
+        :param str templates_folder: absolute path to the templates folder
+        :rtype: Chassis_SeedTemplates
+        '''
+        with Chassis_SeedTemplates._stores_lock:
+            store                                   = Chassis_SeedTemplates._stores_dict.get(templates_folder)
+            if store is None:
+                store                               = Chassis_SeedTemplates(templates_folder)
+                Chassis_SeedTemplates._stores_dict[templates_folder] = store
+        return store
+
+    def restore(self, seed_hub_folder, hub_root):
+        '''
+        Replaces the content of `hub_root` with the template for seeding it from `seed_hub_folder`, if there is an
+        up-to-date one.
+
+        :param str seed_hub_folder: absolute path to the folder in the seed from which the hub is populated, e.g.,
+            ``.../8002/SEED@T0/bundled_repos_local``
+        :param str hub_root: absolute path to the root folder of the data hub to populate
+
+        :returns: True if the template was copied into `hub_root`. False if there is no up-to-date template, in
+            which case `hub_root` is left untouched.
+        :rtype: bool
+        '''
+        template_folder                             = self._path_to_template(seed_hub_folder, hub_root)
+        try:
+            with open(f"{template_folder}/{self.FINGERPRINT_FILE}") as file:
+                fingerprint                         = file.read()
+        except OSError:
+            return False
+        if fingerprint != self._fingerprint(seed_hub_folder):
+            return False
+
+        if _os.path.lexists(hub_root):
+            shutil.rmtree(hub_root)
+        shutil.copytree(f"{template_folder}/{self.CONTENT_FOLDER}", hub_root, symlinks=True)
+        return True
+
+    def save(self, seed_hub_folder, hub_root):
+        '''
+        Saves the current content of `hub_root`, just populated from `seed_hub_folder`, as the template for seeding
+        it from `seed_hub_folder`. Does nothing if `hub_root` doesn't exist (e.g., because the seed has nothing for
+        the hub), in which case there is nothing to be gained from a template.
+
+        :param str seed_hub_folder: absolute path to the folder in the seed from which the hub was populated
+        :param str hub_root: absolute path to the root folder of the data hub that was populated
+        '''
+        if not _os.path.isdir(hub_root):
+            return
+        template_folder                             = self._path_to_template(seed_hub_folder, hub_root)
+
+        # Build the template under a temporary name and swap it in, so that concurrent runs never see a
+        # partial template
+        #
+        staging_folder                              = f"{template_folder}.{uuid.uuid4().hex}.tmp"
+        shutil.copytree(hub_root, f"{staging_folder}/{self.CONTENT_FOLDER}", symlinks=True)
+        with open(f"{staging_folder}/{self.FINGERPRINT_FILE}", "w") as file:
+            file.write(self._fingerprint(seed_hub_folder))
+
+        if _os.path.exists(template_folder):
+            discarded_folder                        = f"{template_folder}.{uuid.uuid4().hex}.old"
+            _os.rename(template_folder, discarded_folder)
+            shutil.rmtree(discarded_folder, ignore_errors=True)
+        _os.rename(staging_folder, template_folder)
+
+    def _path_to_template(self, seed_hub_folder, hub_root):
+        key                                         = hashlib.sha256(f"{seed_hub_folder}\n{hub_root}".encode("utf-8"))
+        return f"{self.templates_folder}/{key.hexdigest()[:32]}"
+
+    def _fingerprint(self, seed_hub_folder):
+        '''
+        Returns a string that changes whenever any file or folder under `seed_hub_folder` is added, removed or
+        modified
+        '''
+        digest                                      = hashlib.sha256()
+        for parent, folder_l, file_l in _os.walk(seed_hub_folder):
+            folder_l.sort()
+            for name in sorted(folder_l + file_l):
+                path                                = _os.path.join(parent, name)
+                stat                                = _os.lstat(path)
+                digest.update(f"{_os.path.relpath(path, seed_hub_folder)}\0{stat.st_mode}\0{stat.st_size}\0"
+                              f"{stat.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()
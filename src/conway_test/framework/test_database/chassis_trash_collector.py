@@ -0,0 +1,171 @@
+import fcntl
+import os                                                                   as _os
+import queue
+import shutil
+import sys                                                                  as _sys
+import threading
+import uuid
+
+
+class Chassis_TrashCollector():
+
+    '''
+    Removes folders in the background, so that deleting the previous contents of a test database (which for GIT-heavy
+    scenarios means thousands of files under ``.git`` folders) is not in the critical path of each test.
+
+    A folder is discarded by atomically renaming it into a trash folder, which is nearly instantaneous, and then it is
+    deleted by one of a fixed number of background threads. Since the threads are daemons, deletions still pending
+    when the process exits are abandoned, and completed by a later collector for the same trash folder.
+
+    Several processes (e.g., the harness daemon and a plain ``python -m unittest``) may share a trash folder, so each
+    collector only deletes what it discarded itself, in its own subfolder ``{pid}-{uuid}``. The subfolder is owned
+    for as long as the collector holds an exclusive lock on the file of the same name plus ``.lock``, which the
+    operating system releases when the process ends. When created, a collector reclaims the subfolders (and any
+    other entries left by older versions of the harness) whose lock it can take, since their owners have ended.
+
+    What can't be deleted is reported on standard error, and left for a later collector to retry.
+
+    Use :meth:`for_trash_folder` to get a collector rather than the constructor, so that all test cases in a process
+    share the same threads.
+
+    :param str trash_folder: absolute path to the trash folder. It must be in the same file system as the folders
+        that will be discarded, since otherwise they can't be renamed into it. It is created if needed.
+    :param int max_workers: maximal number of folders deleted concurrently.
+    '''
+    def __init__(self, trash_folder, max_workers=2):
+        self.trash_folder                           = trash_folder
+        self.max_workers                            = max_workers
+
+        # Take the lock before creating the subfolder, so that other collectors never see it unowned
+        _os.makedirs(trash_folder, exist_ok=True)
+        self.own_folder                             = f"{trash_folder}/{_os.getpid()}-{uuid.uuid4().hex}"
+        self._lock_file                             = open(self.own_folder + self.LOCK_SUFFIX, "w")
+        fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+        _os.makedirs(self.own_folder)
+
+        self._queue                                 = queue.Queue()
+        for _ in range(max_workers):
+            threading.Thread(target=self._work, daemon=True).start()
+
+        self._reclaim()
+
+    # Suffix of the lock file of each collector's subfolder
+    LOCK_SUFFIX                                     = ".lock"
+
+    # Maps the path of each trash folder to the collector for it
+    _collectors_dict                                = {}
+    _collectors_lock                                = threading.Lock()
+
+    def for_trash_folder(trash_folder, max_workers=2):
+        '''
+        Returns the collector for `trash_folder`, creating it the first time it is needed in this process.
+
+        :param str trash_folder: absolute path to the trash folder
+        :param int max_workers: maximal number of folders deleted concurrently. Only used when creating the collector.
+        :rtype: Chassis_TrashCollector
+        '''
+        with Chassis_TrashCollector._collectors_lock:
+            collector                               = Chassis_TrashCollector._collectors_dict.get(trash_folder)
+            if collector is None:
+                collector                           = Chassis_TrashCollector(trash_folder, max_workers)
+                Chassis_TrashCollector._collectors_dict[trash_folder] = collector
+        return collector
+
+    def discard(self, path):
+        '''
+        Moves the folder `path` to the trash, so that it no longer exists when this method returns, and schedules
+        its deletion in the background. Does nothing if `path` doesn't exist.
+
+        If `path` can't be renamed into the trash folder (e.g., because it is in a different file system), it is
+        deleted synchronously instead.
+
+        :param str path: absolute path to the folder to discard
+        '''
+        if not _os.path.lexists(path):
+            return
+        trashed_path                                = f"{self.own_folder}/{uuid.uuid4().hex}"
+        try:
+            _os.rename(path, trashed_path)
+        except OSError:
+            shutil.rmtree(path)
+            return
+        self._queue.put(trashed_path)
+
+    def _reclaim(self):
+        '''
+        Moves into our own subfolder, and schedules for deletion, the entries of the trash folder whose owners have
+        ended: subfolders of other collectors whose lock we can take, and entries without a lock file, which were
+        left by older versions of the harness
+        '''
+        own_name                                    = _os.path.basename(self.own_folder)
+        for name in _os.listdir(self.trash_folder):
+            if name == own_name or name.endswith(self.LOCK_SUFFIX):
+                continue
+            path                                    = f"{self.trash_folder}/{name}"
+            lock_path                               = path + self.LOCK_SUFFIX
+            if not _os.path.exists(lock_path):
+                self._claim(path)
+                continue
+            try:
+                lock_file                           = open(lock_path, "r")
+            except OSError:
+                # Reclaimed by another collector since we listed the trash folder
+                continue
+            with lock_file:
+                try:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    # The owner is alive, and may be deleting entries in this subfolder right now
+                    continue
+                self._claim(path)
+                try:
+                    _os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+
+    def _claim(self, path):
+        '''
+        Moves `path` into our own subfolder and schedules its deletion, unless another collector claimed it first
+        '''
+        claimed_path                                = f"{self.own_folder}/{uuid.uuid4().hex}"
+        try:
+            _os.rename(path, claimed_path)
+        except FileNotFoundError:
+            return
+        self._queue.put(claimed_path)
+
+    def _work(self):
+        while True:
+            trashed_path                            = self._queue.get()
+            failure_l                               = []
+            try:
+                if _os.path.isdir(trashed_path) and not _os.path.islink(trashed_path):
+                    # `onerror` is deprecated as of Python 3.12, and deprecation warnings raised on our threads could
+                    # make whichever test is running fail
+                    #
+                    handler                         = lambda function, path, exc: \
+                                                        self._make_writable_and_retry(function, path, failure_l)
+                    if _sys.version_info >= (3, 12):
+                        shutil.rmtree(trashed_path, onexc=handler)
+                    else:
+                        shutil.rmtree(trashed_path, onerror=handler)
+                elif _os.path.lexists(trashed_path):
+                    _os.remove(trashed_path)
+            except OSError as ex:
+                failure_l.append((trashed_path, ex))
+            if len(failure_l) > 0:
+                # Whatever could not be deleted now will be retried by the next collector for this trash folder
+                path, ex                            = failure_l[0]
+                print(f"Trash collector could not delete {len(failure_l)} path(s) under '{trashed_path}', "
+                      + f"e.g., '{path}': {ex}", file=_sys.stderr)
+
+    def _make_writable_and_retry(self, function, path, failure_l):
+        '''
+        Error handler for :func:`shutil.rmtree`, to cope with read-only files and folders. If `path` still can't be
+        deleted, it is added to `failure_l`, along with the exception, and the deletion continues with other paths.
+        '''
+        try:
+            _os.chmod(path, 0o700)
+            function(path)
+        except OSError as ex:
+            failure_l.append((path, ex))
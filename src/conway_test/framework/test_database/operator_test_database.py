@@ -9,13 +9,20 @@ from conway_acceptance.test_database.test_database
 
 class Operator_TestDatabase(TestDatabase):
 
-    def __init__(self, manifest):
+    def __init__(self, manifest, trash_collector=None, seed_templates=None):
         '''
         :param OperatorScenarioManifest manifest: Object that has connection strings to access the test database that 
             should be used by the test case using this OperatorTestDatabase.
+        :param Chassis_TrashCollector trash_collector: if not None, prior contents of the database are removed by
+            discarding them into this collector, which deletes them in the background.
+        :param Chassis_SeedTemplates seed_templates: if not None, populating the database from a seed copies the
+            templates kept in this store for the seed, and creates them if needed.
         '''
         super().__init__(manifest)
 
+        self.trash_collector                                        = trash_collector
+        self.seed_templates                                         = seed_templates
+
         [local_repos_hub, remote_repos_hub]                         = manifest.get_data_hubs()
 
         self.local_repos_hub                                        = local_repos_hub
@@ -25,17 +32,7 @@ class Operator_TestDatabase(TestDatabase):
         '''
         Uses the data in seeds to initialize the contents of the database. If any prior contents exist, they will be removed.
         '''
-        seed_folder                                                 = self.manifest.path_to_seed()
-
-        self.local_repos_hub.populate_from_seed(Repos_DataHub(
-                                                name        = Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER,
-                                                hub_handle  = RelativeDataHubHandle(seed_folder, 
-                                                                                    Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER)))
-        if self.manifest.profile.REMOTE_IS_LOCAL():
-            self.remote_repos_hub.populate_from_seed(Repos_DataHub(
-                                                name        = Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER, 
-                                                hub_handle  = RelativeDataHubHandle(seed_folder, 
-                                                                                    Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER)))
+        self._seed(seeding_round=0, remove_prior_contents=True)
 
 
     def enrich_from_seed(self, seeding_round):
@@ -53,18 +50,47 @@ class Operator_TestDatabase(TestDatabase):
                 "SEED@T2" for a subsequent phase 2, etc.
 
         '''
-        seed_folder                                                 = self.manifest.path_to_seed(seeding_round)
+        self._seed(seeding_round=seeding_round, remove_prior_contents=False)
 
-        self.local_repos_hub.enrich_from_seed(Repos_DataHub(
-                                                name        = Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER,
-                                                hub_handle  = RelativeDataHubHandle(seed_folder, 
-                                                                                    Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER)))
-        
-        if self.manifest.profile.REMOTE_IS_LOCAL():
-            self.remote_repos_hub.enrich_from_seed(Repos_DataHub(
-                                                name        = Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER, 
-                                                hub_handle  = RelativeDataHubHandle(seed_folder, 
-                                                                                    Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER)))
+    def _seed(self, seeding_round, remove_prior_contents):
+        '''
+        Seeds the data hubs of the database from the seed for `seeding_round`. Packed seeds go through the same
+        path as loose folders, since `self.manifest.path_to_seed(--)` returns the folder into which they were
+        extracted, so the hubs get to prepare whatever they populate (e.g., GIT remotes) in either case.
 
+        @param seeding_round An int, designating the round of seeding.
 
-        
\ No newline at end of file
+        @param remove_prior_contents A bool, stating whether prior contents of the data hubs should be removed
+                (i.e., populate) or kept (i.e., enrich)
+        '''
+        hub_l                                                       = [(self.local_repos_hub,
+                                                                        Chassis_TestStatics.BUNDLED_REPOS_LOCAL_FOLDER)]
+
+        # If the remote repos are GitHub repos virtualized as local bare repos, they are not in the seed: test cases
+        # create them, just as they would create the GitHub repos
+        #
+        if self.manifest.profile.REMOTE_IS_LOCAL() and not self.manifest.virtualized_remote:
+            hub_l.append((self.remote_repos_hub, Chassis_TestStatics.BUNDLED_REPOS_REMOTE_FOLDER))
+
+        # Moving prior contents out of the way is nearly instantaneous, so if we have a trash collector we do it
+        # ourselves rather than waiting for the hubs to delete them
+        #
+        if remove_prior_contents and self.trash_collector is not None:
+            for hub, _ in hub_l:
+                self.trash_collector.discard(hub.hub_root())
+
+        seed_folder                                                 = self.manifest.path_to_seed(seeding_round)
+        for hub, folder in hub_l:
+            seed_hub                                                = Repos_DataHub(
+                                                                            name        = folder,
+                                                                            hub_handle  = RelativeDataHubHandle(seed_folder,
+                                                                                                                folder))
+            if remove_prior_contents and self.seed_templates is not None:
+                seed_hub_folder                                     = f"{seed_folder}/{folder}"
+                if not self.seed_templates.restore(seed_hub_folder, hub.hub_root()):
+                    hub.populate_from_seed(seed_hub)
+                    self.seed_templates.save(seed_hub_folder, hub.hub_root())
+            elif remove_prior_contents:
+                hub.populate_from_seed(seed_hub)
+            else:
+                hub.enrich_from_seed(seed_hub)
@@ -11,6 +11,12 @@ class Chassis_ExcelsToCompare(ExcelsToCompare):
     def __init__(self):
         super().__init__()
 
+        # Maps the relative path of each Excel file added to this object to a list of (worksheet name, is_optional)
+        # pairs, so that the test harness can also compare these worksheets itself. Refer to
+        # RepoManipulationTestCase.assert_database_structure
+        #
+        self.worksheets_dict                                = {}
+
     PUBLICATIONS                                            = "/" + RepoStatics.OPERATOR_REPORTS
 
     XL_REPO_STATS                                           = RepoStatics.REPORT_REPO_STATS + ".xlsx"
@@ -31,6 +37,7 @@ class Chassis_ExcelsToCompare(ExcelsToCompare):
             worksheets.append(RepoAdministration.worksheet_for_log(n, RepoStatics.REMOTE_REPO))
 
         self.addXL(XL, self._WS_INFO(worksheets))
+        self.worksheets_dict[XL]                            = [(w, False) for w in worksheets]
 
 
     def _REPOS(self):
@@ -0,0 +1,199 @@
+import array
+import hashlib
+import json
+import mmap
+import os                                                                   as _os
+import shutil
+import sys                                                                  as _sys
+import tempfile
+import threading
+
+from conway_test.framework.test_logic.chassis_worksheet_table              import Chassis_WorksheetTable, Chassis_XlsxReader
+
+
+class Chassis_ExpectedExcelCache():
+
+    '''
+    Cache of the worksheets of the expected Excel files against which test cases compare their output.
+
+    Parsing an xlsx file (zipped XML) is slow, and the expected files rarely change. So the first time an expected
+    workbook is needed, all its worksheets are parsed and saved in a compact columnar binary form, keyed by the SHA-256
+    of the workbook's content. Afterwards, worksheets are loaded by memory-mapping those binary files, which is
+    nearly free, and the workbook is only read to compute its hash.
+
+    For a workbook with hash `H`, the cache holds a folder `cache_folder/H` with:
+
+    * ``strings.bin``, the UTF-8 encoding of all the distinct strings in the workbook, one after the other
+    * ``offsets.bin``, an array of unsigned 64-bit ints with the offset in ``strings.bin`` where each string
+      starts, plus a final element with the total length of ``strings.bin``
+    * ``N.cells`` for the N-th worksheet, an array of signed 32-bit ints with the position of each cell's value in
+      the string table, column by column, as described in :class:`Chassis_WorksheetTable`
+    * ``manifest.json``, mapping each worksheet name to its number N and its dimensions
+
+    All arrays are in the native byte order and the folder is only used on machines with the same byte order
+    as the one that created it. Folders are written under a temporary name and renamed at the end, so
+    concurrent runs never see a partially written entry.
+
+    Use :meth:`for_cache_folder` to get a cache rather than the constructor, so that worksheets already loaded in
+    this process (e.g., in the harness daemon, by previous runs) are reused.
+
+    :param str cache_folder: absolute path to the folder in which cached workbooks are kept. It is created if needed.
+    '''
+    def __init__(self, cache_folder):
+        self.cache_folder                           = cache_folder
+
+        # Maps the content hash of each workbook to a dictionary of the worksheet tables loaded from it in this
+        # process, so that workbooks with the same content (e.g., in several scenarios) share them, and a workbook
+        # that changes is loaded again
+        #
+        self._tables_dict                           = {}
+
+    # Part of the key of cache entries, so that entries written by older versions of the harness are not used
+    FORMAT_VERSION                                  = 2
+
+    # Maps the path of each cache folder to the cache for it
+    _caches_dict                                    = {}
+    _caches_lock                                    = threading.Lock()
+
+    def for_cache_folder(cache_folder):
+        '''
+        Returns the cache for `cache_folder`, creating it the first time it is needed in this process.
+
+        :param str cache_folder: absolute path to the folder in which cached workbooks are kept
+        :rtype: Chassis_ExpectedExcelCache
+        '''
+        with Chassis_ExpectedExcelCache._caches_lock:
+            cache                                   = Chassis_ExpectedExcelCache._caches_dict.get(cache_folder)
+            if cache is None:
+                cache                               = Chassis_ExpectedExcelCache(cache_folder)
+                Chassis_ExpectedExcelCache._caches_dict[cache_folder] = cache
+        return cache
+
+    def worksheet(self, xlsx_path, worksheet_name):
+        '''
+        Returns a :class:`Chassis_WorksheetTable` with the values of the worksheet `worksheet_name` of the expected
+        Excel file `xlsx_path`, or None if the workbook doesn't have such a worksheet.
+
+        :param str xlsx_path: absolute path to an xlsx file
+        :param str worksheet_name: name of the worksheet
+        :rtype: Chassis_WorksheetTable
+        '''
+        return self.workbook(xlsx_path).get(worksheet_name)
+
+    def workbook(self, xlsx_path):
+        '''
+        Returns a dictionary mapping the name of each worksheet of the expected Excel file `xlsx_path` to a
+        :class:`Chassis_WorksheetTable` with its values. The workbook is read once, to compute its hash, so when
+        comparing several worksheets of a workbook this is cheaper than calling :meth:`worksheet` for each.
+
+        :param str xlsx_path: absolute path to an xlsx file
+        :rtype: dict
+        '''
+        content_hash                                = self._content_hash(xlsx_path)
+        tables_dict                                 = self._tables_dict.get(content_hash)
+        if tables_dict is None:
+            tables_dict                             = self._load(xlsx_path, content_hash)
+            self._tables_dict[content_hash]         = tables_dict
+        return tables_dict
+
+    def _load(self, xlsx_path, content_hash):
+        '''
+        Returns a dictionary of all the worksheet tables in `xlsx_path`, whose content hash is `content_hash`, from
+        the cache if possible. On a cache miss the workbook is parsed and added to the cache.
+        '''
+        entry_folder                                = f"{self.cache_folder}/{content_hash}"
+        if not _os.path.exists(f"{entry_folder}/manifest.json"):
+            self._save(Chassis_XlsxReader(xlsx_path).read(), entry_folder)
+
+        with open(f"{entry_folder}/manifest.json") as file:
+            manifest_dict                           = json.load(file)
+
+        string_table                                = _MappedStringTable(f"{entry_folder}/strings.bin",
+                                                                         self._map_array(f"{entry_folder}/offsets.bin", "Q"))
+        tables_dict                                 = {}
+        for name, info in manifest_dict["worksheets"].items():
+            cell_index_array                        = self._map_array(f"{entry_folder}/{info['number']}.cells", "i")
+            tables_dict[name]                       = Chassis_WorksheetTable(info["nb_rows"], info["nb_cols"],
+                                                                             cell_index_array, string_table)
+        return tables_dict
+
+    def _save(self, tables_dict, entry_folder):
+        '''
+        Saves all the `tables_dict` of a workbook as a new entry in the cache, in `entry_folder`
+        '''
+        _os.makedirs(self.cache_folder, exist_ok=True)
+        staging_folder                              = tempfile.mkdtemp(dir=self.cache_folder, prefix=".staging_")
+
+        # Since each table has its own string table, we merge them into a single one for the workbook, and
+        # re-map the positions in each table accordingly
+        #
+        position_dict                               = {}
+        manifest_dict                               = {"format_version": self.FORMAT_VERSION, "worksheets": {}}
+        for number, (name, table) in enumerate(tables_dict.items()):
+            remap_l                                 = [position_dict.setdefault(s, len(position_dict))
+                                                       for s in table.string_table]
+            cell_index_array                        = array.array("i", [remap_l[p] if p >= 0 else -1
+                                                                        for p in table.cell_index_array])
+            with open(f"{staging_folder}/{number}.cells", "wb") as file:
+                cell_index_array.tofile(file)
+            manifest_dict["worksheets"][name]       = {"number":    number,
+                                                       "nb_rows":   table.nb_rows,
+                                                       "nb_cols":   table.nb_cols}
+
+        offsets_array                               = array.array("Q", [0])
+        with open(f"{staging_folder}/strings.bin", "wb") as file:
+            for s in position_dict.keys():
+                offsets_array.append(offsets_array[-1] + file.write(s.encode("utf-8")))
+        with open(f"{staging_folder}/offsets.bin", "wb") as file:
+            offsets_array.tofile(file)
+        with open(f"{staging_folder}/manifest.json", "w") as file:
+            json.dump(manifest_dict, file, indent=4)
+
+        try:
+            _os.rename(staging_folder, entry_folder)
+        except OSError:
+            # Some other process cached the same workbook in the meantime, so we can use theirs
+            shutil.rmtree(staging_folder)
+
+    def _map_array(self, path, typecode):
+        '''
+        Returns a read-only memoryview of the ints in the file `path`, which is memory-mapped. `typecode` is the
+        format of the ints, as in the :mod:`array` module.
+        '''
+        if _os.path.getsize(path) == 0:
+            return array.array(typecode)
+        with open(path, "rb") as file:
+            mapped                                  = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(mapped).cast(typecode)
+
+    def _content_hash(self, path):
+        digest                                      = hashlib.sha256()
+        digest.update(f"{self.FORMAT_VERSION}:{_sys.byteorder}:".encode("utf-8"))
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b""):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+
+class _MappedStringTable():
+
+    '''
+    Helper class for :class:`Chassis_ExpectedExcelCache`, that exposes the strings saved in a cache entry as a
+    sequence of str without loading them all: each string is decoded from the memory-mapped file when accessed.
+
+    :param str path: absolute path to the ``strings.bin`` file of a cache entry
+    :param offsets: sequence of ints with the offset at which each string starts, plus the total length
+    '''
+    def __init__(self, path, offsets):
+        self.offsets                                = offsets
+        if _os.path.getsize(path) == 0:
+            self.data                               = b""
+        else:
+            with open(path, "rb") as file:
+                self.data                           = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position):
+        return self.data[self.offsets[position]:self.offsets[position + 1]].decode("utf-8")
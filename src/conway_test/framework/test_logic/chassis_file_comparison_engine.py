@@ -0,0 +1,128 @@
+import concurrent.futures
+import mmap
+import os                                                                   as _os
+import threading
+
+
+class Chassis_FileComparisonEngine():
+
+    '''
+    Compares the content of many pairs of files (actual versus expected) at disk bandwidth, for use when asserting
+    the structure of a test database that may contain thousands of generated files.
+
+    Comparison proceeds in two passes:
+
+    * First, all files are stat'ed and pairs whose sizes differ (or where one side is missing) are rejected right
+      away, without reading them. Pairs of empty files are accepted right away.
+    * The remaining candidates, which have the same size, are compared on a thread pool, largest first so that the
+      pool stays balanced. Large files are memory-mapped and compared chunk by chunk, stopping at the first chunk
+      that differs. Small files are just read, since mapping them costs more than reading them.
+
+    :param bool fail_fast: if True, comparison stops as soon as one difference is found, and only that difference
+        is reported. Otherwise all differences are reported.
+    :param int max_workers: number of threads used to compare file contents. If None, it is chosen as in
+        :class:`concurrent.futures.ThreadPoolExecutor`.
+    :param int chunk_size: number of bytes compared at a time for memory-mapped files.
+    '''
+    def __init__(self, fail_fast=False, max_workers=None, chunk_size=1024 * 1024):
+        self.fail_fast                              = fail_fast
+        self.max_workers                            = max_workers
+        self.chunk_size                             = chunk_size
+
+    # Files smaller than this number of bytes are read instead of memory-mapped
+    MMAP_THRESHOLD                                  = 64 * 1024
+
+    def compare(self, actual_root, expected_root, relative_paths):
+        '''
+        Compares each file in `relative_paths` under `actual_root` to the file with the same relative path under
+        `expected_root`.
+
+        :param str actual_root: absolute path to the folder with the actual files
+        :param str expected_root: absolute path to the folder with the expected files
+        :param list[str] relative_paths: paths of the files to compare, relative to both roots
+
+        :returns: a list of (relative path, description) pairs, one for each file that differs, sorted by relative
+            path. Empty if all files are the same.
+        :rtype: list[tuple[str, str]]
+        '''
+        difference_l                                = []
+        candidate_l                                 = []
+        for relative_path in relative_paths:
+            actual_path                             = _os.path.join(actual_root, relative_path)
+            expected_path                           = _os.path.join(expected_root, relative_path)
+            actual_size                             = self._size(actual_path)
+            expected_size                           = self._size(expected_path)
+            if actual_size is None or expected_size is None:
+                missing_side                        = "actual" if actual_size is None else "expected"
+                difference_l.append((relative_path, f"missing in {missing_side}"))
+            elif actual_size != expected_size:
+                difference_l.append((relative_path, f"expected {expected_size} bytes but got {actual_size}"))
+            elif actual_size > 0:
+                candidate_l.append((actual_size, relative_path, actual_path, expected_path))
+
+            if self.fail_fast and len(difference_l) > 0:
+                return difference_l[:1]
+
+        candidate_l.sort(reverse=True)
+        stop_event                                  = threading.Event()
+        with concurrent.futures.ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            future_dict                             = {executor.submit(self._first_difference, size, actual_path,
+                                                                       expected_path, stop_event): relative_path
+                                                       for size, relative_path, actual_path, expected_path in candidate_l}
+            for future in concurrent.futures.as_completed(future_dict):
+                offset                              = future.result()
+                if offset is None:
+                    continue
+                difference_l.append((future_dict[future], f"content differs starting at byte {offset}"))
+                if self.fail_fast:
+                    stop_event.set()
+                    for pending in future_dict:
+                        pending.cancel()
+                    break
+
+        if self.fail_fast:
+            return difference_l[:1]
+        return sorted(difference_l)
+
+    def _size(self, path):
+        '''
+        Returns the size in bytes of the file `path`, or None if it doesn't exist or is not a file
+        '''
+        try:
+            stat                                    = _os.stat(path)
+        except OSError:
+            return None
+        return stat.st_size if _os.path.isfile(path) else None
+
+    def _first_difference(self, size, actual_path, expected_path, stop_event):
+        '''
+        Returns the offset of the first byte at which two files of the same `size` differ, or None if they are
+        the same (or if comparison was abandoned because `stop_event` was set)
+        '''
+        with open(actual_path, "rb") as actual_file, open(expected_path, "rb") as expected_file:
+            if size < self.MMAP_THRESHOLD:
+                return self._offset_in_chunk(actual_file.read(), expected_file.read(), 0)
+
+            with mmap.mmap(actual_file.fileno(), 0, access=mmap.ACCESS_READ) as actual_map, \
+                 mmap.mmap(expected_file.fileno(), 0, access=mmap.ACCESS_READ) as expected_map:
+                for start in range(0, size, self.chunk_size):
+                    if stop_event.is_set():
+                        return None
+                    end                             = start + self.chunk_size
+                    offset                          = self._offset_in_chunk(actual_map[start:end],
+                                                                            expected_map[start:end], start)
+                    if offset is not None:
+                        return offset
+        return None
+
+    def _offset_in_chunk(self, actual_chunk, expected_chunk, start):
+        '''
+        Returns the offset (counting from `start`) of the first byte that differs between two chunks, or None if
+        they are the same
+        '''
+        if actual_chunk == expected_chunk:
+            return None
+        for idx, (a, b) in enumerate(zip(actual_chunk, expected_chunk)):
+            if a != b:
+                return start + idx
+        return start + min(len(actual_chunk), len(expected_chunk))
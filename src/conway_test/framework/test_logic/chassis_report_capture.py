@@ -0,0 +1,151 @@
+import os                                                                   as _os
+
+import xlsxwriter
+
+from conway_test.framework.test_logic.chassis_worksheet_table              import Chassis_WorksheetTable
+
+
+class Chassis_ReportCapture():
+
+    '''
+    Python context manager that captures the tabular data of the Excel reports created by the code under test
+    (e.g., by ``create_repo_report``) before it is serialized, so that the test harness can compare it directly
+    against the expected worksheets without first writing an xlsx file and then parsing it back.
+
+    While the context is active, closing any :class:`xlsxwriter.Workbook` doesn't write the file. Instead, the values
+    of its worksheets are captured as :class:`Chassis_WorksheetTable` objects, and writing the file is deferred until
+    :meth:`flush` is called. Test cases are expected to flush a workbook if its comparison fails, so that it can be
+    inspected.
+
+    When the context exits, workbooks that were not flushed are discarded, unless `write_all` is True or the context
+    exits due to an exception, in which case all of them are written.
+
+    Workbooks written to a file handle rather than to a path (as pandas' ``ExcelWriter`` does) are captured too,
+    under the name of the file, but they are written right away, since whoever opened the handle will close it.
+    Workbooks that can't be captured are written as usual, and their names are listed in `uncaptured_l` so that
+    test cases can tell why a workbook they expected is missing: those created in ``constant_memory`` mode, since
+    xlsxwriter doesn't keep their cells in memory, and those written to in-memory buffers, which have no name.
+
+    :param bool write_all: whether all captured workbooks should be written when the context exits.
+    '''
+    def __init__(self, write_all=False):
+        self.write_all                              = write_all
+
+        # Maps the normalized path of each captured workbook to a pair: the workbook, and a dictionary
+        # of its worksheet tables
+        #
+        self._captured_dict                         = {}
+        self._original_close                        = None
+
+        # Descriptions of the workbooks that were written without being captured
+        self.uncaptured_l                           = []
+
+    def __enter__(self):
+        capture                                     = self
+        original_close                              = xlsxwriter.Workbook.close
+
+        def deferred_close(workbook):
+            if workbook.fileclosed:
+                return original_close(workbook)
+            path                                    = workbook.filename
+            if not isinstance(path, (str, _os.PathLike)):
+                path                                = getattr(workbook.filename, "name", None)
+            if workbook.constant_memory or not isinstance(path, (str, _os.PathLike)):
+                reason                              = "constant_memory mode" if workbook.constant_memory \
+                                                        else f"written to {type(workbook.filename).__name__}"
+                capture.uncaptured_l.append(f"{path or '(unnamed workbook)'} ({reason})")
+                return original_close(workbook)
+
+            capture._captured_dict[capture._normalize(path)] = (workbook, capture._capture(workbook))
+            if path is not workbook.filename:
+                # A file handle, so it must be written before its owner closes it
+                return original_close(workbook)
+
+        self._original_close                        = original_close
+        xlsxwriter.Workbook.close                   = deferred_close
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        xlsxwriter.Workbook.close                   = self._original_close
+
+        if self.write_all or exc_type is not None:
+            for path in list(self._captured_dict.keys()):
+                self.flush(path)
+
+        for workbook, _ in self._captured_dict.values():
+            # So that workbooks that were never written don't look like they are still open
+            workbook.fileclosed                     = True
+        self._captured_dict                         = {}
+        self.uncaptured_l                           = []
+
+    def tables(self, path):
+        '''
+        Returns a dictionary mapping worksheet names to :class:`Chassis_WorksheetTable` objects for the workbook that
+        the code under test attempted to save as `path`, or None if no such workbook was captured.
+
+        :param str path: absolute path of an Excel file
+        :rtype: dict
+        '''
+        captured                                    = self._captured_dict.get(self._normalize(path))
+        return None if captured is None else captured[1]
+
+    def flush(self, path):
+        '''
+        Writes the captured workbook for `path` to the file system, as the code under test originally intended.
+        Does nothing if no workbook was captured for `path` or if it was already written.
+
+        :param str path: absolute path of an Excel file
+        '''
+        captured                                    = self._captured_dict.get(self._normalize(path))
+        if captured is not None and not captured[0].fileclosed:
+            self._original_close(captured[0])
+
+    def _normalize(self, path):
+        return _os.path.normpath(_os.path.abspath(_os.fspath(path)))
+
+    def _capture(self, workbook):
+        '''
+        Returns a dictionary mapping the name of each worksheet of `workbook` to a :class:`Chassis_WorksheetTable`
+        with the values that would be written for its cells.
+        '''
+        string_l                                    = [None] * len(workbook.str_table.string_table)
+        for string, index in workbook.str_table.string_table.items():
+            string_l[index]                         = string
+
+        result_dict                                 = {}
+        for worksheet in workbook.worksheets():
+            rows_dict                               = {row: {col: self._cell_value(cell, string_l)
+                                                             for col, cell in cols_dict.items()}
+                                                       for row, cols_dict in worksheet.table.items()}
+            result_dict[worksheet.name]             = Chassis_WorksheetTable.build(rows_dict)
+        return result_dict
+
+    def _cell_value(self, cell, string_l):
+        '''
+        Returns the value of an xlsxwriter `cell` as it would be read back from the xlsx file by
+        :class:`Chassis_XlsxReader`
+        '''
+        kind                                        = cell.__class__.__name__
+        if kind in ["Number", "Datetime"]:
+            return Chassis_WorksheetTable.normalize_number(cell.number)
+        if kind == "String":
+            return string_l[cell.string]
+        if kind == "RichString":
+            return cell.raw_string
+        if kind == "Boolean":
+            return str(int(cell.boolean))
+        if kind == "Error":
+            return cell.error
+        if kind in ["Formula", "ArrayFormula"]:
+            # The cached result of the formula is what gets written as the cell's value
+            value                                   = cell.value
+            if isinstance(value, bool):
+                return str(int(value))
+            if value is None or value == "":
+                return None
+            try:
+                return Chassis_WorksheetTable.normalize_number(value)
+            except ValueError:
+                return str(value)
+        # Blank cells only have formatting
+        return None
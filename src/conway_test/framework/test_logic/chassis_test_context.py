@@ -1,3 +1,4 @@
+import contextlib
 import os as _os
 
 from conway.application.application                                         import Application
@@ -7,14 +8,34 @@ from conway_acceptance.test_logic.acceptance_test_context                   impo
 from conway_acceptance.util.scenarios_config                                import ScenariosConfig
 from conway_acceptance.util.test_statics                                    import TestStatics
 
+from conway_test.framework.observability.chassis_memory_profiler           import Chassis_MemoryProfiler
+from conway_test.framework.observability.chassis_run_archive               import Chassis_RunArchive
+from conway_test.framework.observability.chassis_subprocess_tracer         import Chassis_SubprocessTracer
 from conway_test.framework.scenario_foundry.operator_scenario_manifest      import OperatorScenarioManifest
+from conway_test.framework.test_database.chassis_seed_templates             import Chassis_SeedTemplates
+from conway_test.framework.test_database.chassis_trash_collector            import Chassis_TrashCollector
 from conway_test.framework.test_database.operator_test_database             import Operator_TestDatabase
+from conway_test.framework.test_logic.chassis_expected_excel_cache          import Chassis_ExpectedExcelCache
+from conway_test.framework.test_logic.chassis_file_comparison_engine        import Chassis_FileComparisonEngine
+from conway_test.framework.test_logic.chassis_report_capture                import Chassis_ReportCapture
+from conway_test.util.chassis_test_statics                                  import Chassis_TestStatics
+from conway_test.util.conway_test_utils                                     import ConwayTestUtils
 
 
 class Chassis_TestContext(AcceptanceTestContext):
 
     def __init__(self, test_case_name, notes, 
-                 seeding_round                  = 0):
+                 seeding_round                  = 0,
+                 profile_memory                 = None,
+                 trace_subprocesses             = None,
+                 memoize_git_queries            = None,
+                 local_remote                   = None,
+                 cache_expected_excels          = None,
+                 compare_reports_in_memory      = None,
+                 compare_files_in_parallel      = None,
+                 background_teardown            = None,
+                 archive_run                    = None,
+                 use_seed_templates             = None):
         '''
         This class is a Python context manager intended to be invoked by each test method of any of the test classes in
         the conway_test module.
@@ -38,10 +59,92 @@ class Chassis_TestContext(AcceptanceTestContext):
                 "SEED@T2" for a subsequent phase 2, etc. Each seeding event should use a different AcceptanceTestContext
                 object
 
+        @param profile_memory A bool, stating whether the memory consumed by each phase of the test case should be
+                profiled. If None, it is determined by whether the environment variable given by
+                Chassis_TestStatics.PROFILE_MEMORY is set. Results are saved next to the run notes, in a file
+                given by Chassis_TestStatics.MEMORY_PROFILE_FILE. Phases are delimited by the test case by
+                calling self.phase(--).
+
+        @param trace_subprocesses A bool, stating whether the subprocesses launched during the test case (mostly GIT
+                commands) should be traced. If None, it is determined by whether the environment variable given by
+                Chassis_TestStatics.TRACE_SUBPROCESSES is set. The report is saved next to the run notes, in a file
+                given by Chassis_TestStatics.SUBPROCESS_TRACE_FILE.
+
+        @param memoize_git_queries A bool, stating whether identical read-only GIT queries within a phase should be
+                served from memory instead of launching a new subprocess. If None, it is determined by whether the 
+                environment variable given by Chassis_TestStatics.MEMOIZE_GIT_QUERIES is set. If True, subprocesses
+                are traced regardless of the value of `trace_subprocesses`.
+
+        @param local_remote A bool, stating whether remote repos in GitHub should be virtualized as local bare repos,
+                so that the test case runs entirely on the local disk. If None, it is determined by whether the 
+                environment variable given by Chassis_TestStatics.LOCAL_REMOTE is set. Refer to 
+                OperatorScenarioManifest for details.
+
+        @param cache_expected_excels A bool, stating whether the expected side of Excel comparisons should be loaded
+                from a cache of already parsed worksheets. If None, it is determined by whether the environment 
+                variable given by Chassis_TestStatics.CACHE_EXPECTED_EXCELS is set. Refer to 
+                RepoManipulationTestCase.assert_database_structure for details.
+
+        @param compare_reports_in_memory A bool, stating whether Excel reports created by the test case should be
+                captured in memory and compared without writing them as xlsx files. If None, it is determined by 
+                whether the environment variable given by Chassis_TestStatics.IN_MEMORY_REPORTS is set. Reports are
+                still written if their comparison fails, or always if the environment variable given by
+                Chassis_TestStatics.WRITE_REPORTS is set. Refer to Chassis_ReportCapture for details.
+
+        @param compare_files_in_parallel A bool, stating whether the database structure should be asserted by the 
+                harness, comparing files in parallel. If None, it is determined by whether the environment variable
+                given by Chassis_TestStatics.PARALLEL_FILE_COMPARISON is set. Refer to 
+                RepoManipulationTestCase.assert_database_structure for details.
+
+        @param background_teardown A bool, stating whether prior contents of the test database should be deleted in
+                the background instead of before seeding. If None, it is determined by whether the environment 
+                variable given by Chassis_TestStatics.BACKGROUND_TEARDOWN is set. Refer to Chassis_TrashCollector
+                for details.
+
+        @param archive_run A bool, stating whether the actuals and run notes should be archived when the test case
+                ends, so that they can later be checked out or compared with other runs. If None, it is determined by
+                whether the environment variable given by Chassis_TestStatics.ARCHIVE_RUNS is set. The manifest of
+                the archived run is then available as self.archived_run. Refer to Chassis_RunArchive for details.
+
+        @param use_seed_templates A bool, stating whether populating the test database from a seed (loose or packed)
+                should copy a template saved by a previous seeding from the same seed. If None, it is determined by
+                whether the environment variable given by Chassis_TestStatics.SEED_TEMPLATES is set, which the harness
+                daemon does by default. Refer to Chassis_SeedTemplates for details.
+
         '''
         scenarios_repo                                  = self._scenarios_repo()
         scenario_id                                     = ScenariosConfig(scenarios_repo).get_scenario_id(test_case_name)
-        manifest                                        = OperatorScenarioManifest(scenarios_repo, scenario_id)
+        manifest                                        = OperatorScenarioManifest(scenarios_repo, scenario_id, 
+                                                                                   local_remote = local_remote)
+
+        # The parent's constructor may initialize the test database, so the objects it needs must be in place
+        # before calling it
+        #
+        if background_teardown is None:
+            background_teardown                                     = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.BACKGROUND_TEARDOWN)
+        if background_teardown:
+            max_workers                                             = int(_os.environ.get(
+                                                                                Chassis_TestStatics.TEARDOWN_WORKERS, 2))
+            self.trash_collector                                    = Chassis_TrashCollector.for_trash_folder(
+                                                                        f"{scenarios_repo}/{Chassis_TestStatics.TRASH_FOLDER}",
+                                                                        max_workers)
+            # The trash must be in the same file system as the actuals, so it lives in the scenarios repo, but it
+            # must not show up as untracked content there
+            #
+            ConwayTestUtils.exclude_from_git(scenarios_repo, Chassis_TestStatics.TRASH_FOLDER)
+        else:
+            self.trash_collector                                    = None
+
+        if use_seed_templates is None:
+            use_seed_templates                                      = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.SEED_TEMPLATES)
+        if use_seed_templates:
+            self.seed_templates                                     = Chassis_SeedTemplates.for_templates_folder(
+                                                                        ConwayTestUtils.work_folder(
+                                                                                Chassis_TestStatics.SEED_TEMPLATES_FOLDER))
+        else:
+            self.seed_templates                                     = None
 
         super().__init__(scenario_id, manifest, notes, seeding_round)
 
@@ -49,6 +152,60 @@ class Chassis_TestContext(AcceptanceTestContext):
         #
         self.warnings_ctx                                           = WarningsFilter()
 
+        if profile_memory is None:
+            profile_memory                                          = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.PROFILE_MEMORY)
+        self.memory_profiler                                        = Chassis_MemoryProfiler() if profile_memory else None
+
+        if trace_subprocesses is None:
+            trace_subprocesses                                      = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.TRACE_SUBPROCESSES)
+        if memoize_git_queries is None:
+            memoize_git_queries                                     = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.MEMOIZE_GIT_QUERIES)
+        if trace_subprocesses or memoize_git_queries:
+            self.subprocess_tracer                                  = Chassis_SubprocessTracer(memoize=memoize_git_queries)
+        else:
+            self.subprocess_tracer                                  = None
+
+        if cache_expected_excels is None:
+            cache_expected_excels                                   = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.CACHE_EXPECTED_EXCELS)
+        if cache_expected_excels:
+            self.excel_cache                                        = Chassis_ExpectedExcelCache.for_cache_folder(ConwayTestUtils.work_folder(
+                                                                        Chassis_TestStatics.EXPECTED_EXCELS_CACHE_FOLDER))
+        else:
+            self.excel_cache                                        = None
+
+        if compare_reports_in_memory is None:
+            compare_reports_in_memory                               = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.IN_MEMORY_REPORTS)
+        if compare_reports_in_memory:
+            self.report_capture                                     = Chassis_ReportCapture(write_all=ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.WRITE_REPORTS))
+        else:
+            self.report_capture                                     = None
+
+        if compare_files_in_parallel is None:
+            compare_files_in_parallel                               = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.PARALLEL_FILE_COMPARISON)
+        if compare_files_in_parallel:
+            self.file_comparison_engine                             = Chassis_FileComparisonEngine(
+                                                                        fail_fast = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.FAIL_FAST))
+        else:
+            self.file_comparison_engine                             = None
+
+        if archive_run is None:
+            archive_run                                             = ConwayTestUtils.is_env_flag_set(
+                                                                                Chassis_TestStatics.ARCHIVE_RUNS)
+        if archive_run:
+            self.run_archive                                        = Chassis_RunArchive(ConwayTestUtils.work_folder(
+                                                                        Chassis_TestStatics.RUN_ARCHIVE_FOLDER))
+        else:
+            self.run_archive                                        = None
+        self.archived_run                                           = None
+
     def _scenarios_repo(self):
         '''
         '''
@@ -59,13 +216,38 @@ class Chassis_TestContext(AcceptanceTestContext):
         
         return scenarios_repo
 
+    def _path_to_run_notes(self):
+        '''
+        Returns the folder where the run notes of this scenario are saved, which is also where the harness saves
+        any other run-specific observations (such as memory profiles) that should be reviewed alongside the notes.
+        '''
+        return f"{self.manifest.scenarios_root_folder}/{self.scenario_id}/{TestStatics.RUN_NOTES}"
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        '''
+        Context manager that test cases can use to delimit a phase of their logic, such as "create_repo_report",
+        so that any instrumentation turned on for this context is attributed to that phase. If no instrumentation
+        is turned on, this does nothing.
+
+        :param str name: name of the phase
+        '''
+        with contextlib.ExitStack() as stack:
+            if self.memory_profiler is not None:
+                stack.enter_context(self.memory_profiler.phase(name))
+            if self.subprocess_tracer is not None:
+                stack.enter_context(self.subprocess_tracer.phase(name))
+            yield self
+
     def initialize_database(self):
         '''
         Constructs an instance of a TestDatabase concrete class and sets it as the value of self.test_database
 
         @param spec A ScenarioSpec object used to create the TestDatabase object created by this method.
         '''
-        self.test_database                              = Operator_TestDatabase(self.manifest)
+        self.test_database                              = Operator_TestDatabase(self.manifest,
+                                                                                trash_collector = self.trash_collector,
+                                                                                seed_templates  = self.seed_templates)
 
     def __enter__(self):
         '''
@@ -74,11 +256,31 @@ class Chassis_TestContext(AcceptanceTestContext):
         test cases that rely on this context manager. For example, self includes an attribute for the 
         TestDatabase object that the test case should use.
         '''
-        super().__enter__()
-
-        # Capture warnings during the test, so enter the warnings context manager
+        # If anything fails, __exit__ won't be called, so undo whatever was done so far. In particular, stop
+        # instrumentation, since otherwise library functions would stay patched for the rest of the process
         #
-        self.warnings_ctx.__enter__()
+        with contextlib.ExitStack() as stack:
+            if self.subprocess_tracer is not None:
+                self.subprocess_tracer.start()
+                stack.callback(self.subprocess_tracer.stop)
+            if self.memory_profiler is not None:
+                stack.callback(self.memory_profiler.stop)
+
+            # Seeding the test database happens in the parent's __enter__, so that is our first phase
+            #
+            with self.phase("seeding"):
+                super().__enter__()
+
+            # Capture warnings during the test, so enter the warnings context manager
+            #
+            self.warnings_ctx.__enter__()
+            stack.push(self.warnings_ctx.__exit__)
+
+            if self.report_capture is not None:
+                self.report_capture.__enter__()
+                stack.push(self.report_capture.__exit__)
+
+            stack.pop_all()
 
         return self
     
@@ -93,12 +295,46 @@ class Chassis_TestContext(AcceptanceTestContext):
         Refer to conway.async_utils.schedule_based_log_sorter.ScheduleBasedLogSorter for more information about
         what scheduled-based logging is about.
         '''
-        super().__exit__(exc_type, exc_value, exc_tb)
+        # Each step runs even if an earlier one raises (e.g., the WarningsFilter raises on unexpected warnings), since
+        # instrumentation must be stopped regardless, and profiles and archived runs matter most for failed runs.
+        # Callbacks run in the reverse order in which they are registered, so the archive goes last, so that the
+        # archived run notes include the reports saved before it
+        #
+        with contextlib.ExitStack() as stack:
+            if self.run_archive is not None:
+                stack.callback(self._archive_run)
 
-        Application.app().logger.flush()
+            if self.subprocess_tracer is not None:
+                stack.callback(self._save_subprocess_trace)
 
-        # Check out the collected warnings, and if appropriate raise errors. This is done by delegating
-        # to the WarningsFilter
-        #
-        self.warnings_ctx.__exit__(exc_type, exc_value, exc_tb)
+            if self.memory_profiler is not None:
+                stack.callback(self._save_memory_profile)
+
+            # Check out the collected warnings, and if appropriate raise errors. This is done by delegating
+            # to the WarningsFilter
+            #
+            stack.callback(self.warnings_ctx.__exit__, exc_type, exc_value, exc_tb)
+
+            stack.callback(Application.app().logger.flush)
+
+            stack.callback(super().__exit__, exc_type, exc_value, exc_tb)
+
+            # Stop capturing reports first, so that any reports that must be written are in place before notes
+            # are saved
+            #
+            if self.report_capture is not None:
+                stack.callback(self.report_capture.__exit__, exc_type, exc_value, exc_tb)
+
+    def _save_memory_profile(self):
+        self.memory_profiler.stop()
+        self.memory_profiler.save(f"{self._path_to_run_notes()}/{Chassis_TestStatics.MEMORY_PROFILE_FILE}")
+
+    def _save_subprocess_trace(self):
+        self.subprocess_tracer.stop()
+        self.subprocess_tracer.save(f"{self._path_to_run_notes()}/{Chassis_TestStatics.SUBPROCESS_TRACE_FILE}")
+
+    def _archive_run(self):
+        self.archived_run                                           = self.run_archive.archive(self.scenario_id, {
+                                                                        "ACTUALS":      self.manifest.path_to_actuals(),
+                                                                        "RUN_NOTES":    self._path_to_run_notes()})
     
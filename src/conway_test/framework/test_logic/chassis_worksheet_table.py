@@ -0,0 +1,226 @@
+import array
+import posixpath
+import re
+import xml.etree.ElementTree                                                as _ET
+import zipfile
+
+
+class Chassis_WorksheetTable():
+
+    '''
+    Columnar, read-only representation of the cell values of an Excel worksheet, used by the test harness to
+    compare worksheets without depending on how they were produced (parsed from an xlsx file, loaded from a cache,
+    or captured in memory before being written to an xlsx file).
+
+    Every cell value is represented as a string (or None for empty cells), normalized so that the same value
+    gets the same string regardless of how it was produced. For example, numbers are formatted as Excel
+    formats them in the XML of a workbook. Please refer to :meth:`normalize_number`.
+
+    Cells are stored column by column: `cell_index_array[col * nb_rows + row]` is the position of the cell's
+    value in `string_table`, or -1 if the cell is empty. This makes it possible to back a table by memory-mapped
+    arrays, as is done by :class:`Chassis_ExpectedExcelCache`.
+
+    :param int nb_rows: number of rows of the table
+    :param int nb_cols: number of columns of the table
+    :param cell_index_array: sequence of ints, of length `nb_rows * nb_cols`, as described above. Normally an
+        :class:`array.array` or a :class:`memoryview` of signed ints.
+    :param string_table: sequence of the distinct strings in the table, such as a list of str.
+    '''
+    def __init__(self, nb_rows, nb_cols, cell_index_array, string_table):
+        self.nb_rows                                = nb_rows
+        self.nb_cols                                = nb_cols
+        self.cell_index_array                       = cell_index_array
+        self.string_table                           = string_table
+
+    def build(rows_dict):
+        '''
+        Returns a new :class:`Chassis_WorksheetTable` from a sparse representation of a worksheet.
+
+        :param dict rows_dict: dictionary whose keys are 0-based row numbers and whose values are dictionaries
+            mapping 0-based column numbers to the (already normalized) string value of the cell. Empty cells
+            may be absent or have a value of None.
+        :rtype: Chassis_WorksheetTable
+        '''
+        nb_rows                                     = max(rows_dict.keys(), default=-1) + 1
+        nb_cols                                     = max((max(cols.keys(), default=-1) for cols in rows_dict.values()),
+                                                          default=-1) + 1
+
+        string_table                                = []
+        position_dict                               = {}
+        cell_index_array                            = array.array("i", [-1]) * (nb_rows * nb_cols)
+        for row, cols_dict in rows_dict.items():
+            for col, value in cols_dict.items():
+                if value is None:
+                    continue
+                position                            = position_dict.get(value)
+                if position is None:
+                    position                        = len(string_table)
+                    position_dict[value]            = position
+                    string_table.append(value)
+                cell_index_array[col * nb_rows + row] = position
+
+        return Chassis_WorksheetTable(nb_rows, nb_cols, cell_index_array, string_table)
+
+    def cell(self, row, col):
+        '''
+        Returns the string value of the cell at 0-based position (`row`, `col`), or None if it is empty or
+        outside the table.
+        '''
+        if row >= self.nb_rows or col >= self.nb_cols:
+            return None
+        position                                    = self.cell_index_array[col * self.nb_rows + row]
+        return None if position < 0 else self.string_table[position]
+
+    def differences(self, expected, max_differences=20):
+        '''
+        Compares this table, regarded as the actual values, to the `expected` table, and returns a list of strings,
+        each describing a cell with a different value, e.g., "C7: expected '3' but got '4'". Returns an empty list
+        if both tables have the same values.
+
+        :param Chassis_WorksheetTable expected: the table to compare to.
+        :param int max_differences: maximal number of differences to describe. Comparison stops once this number is
+            reached.
+        :rtype: list[str]
+        '''
+        difference_l                                = []
+        for col in range(max(self.nb_cols, expected.nb_cols)):
+            for row in range(max(self.nb_rows, expected.nb_rows)):
+                actual_value                        = self.cell(row, col)
+                expected_value                      = expected.cell(row, col)
+                if actual_value != expected_value:
+                    difference_l.append(f"{Chassis_WorksheetTable.cell_name(row, col)}: "
+                                        + f"expected {expected_value!r} but got {actual_value!r}")
+                    if len(difference_l) >= max_differences:
+                        return difference_l
+        return difference_l
+
+    def cell_name(row, col):
+        '''
+        Returns the Excel name (e.g., "C7") of the cell at 0-based position (`row`, `col`)
+        '''
+        letters                                     = ""
+        col                                         += 1
+        while col > 0:
+            col, remainder                          = divmod(col - 1, 26)
+            letters                                 = chr(ord("A") + remainder) + letters
+        return f"{letters}{row + 1}"
+
+    def normalize_number(number):
+        '''
+        Returns the string that represents the number `number` in a :class:`Chassis_WorksheetTable`. This is the same
+        format used for numbers in the XML of workbooks written by xlsxwriter (and, for all practical purposes, Excel).
+
+        :param number: a number, or the string representation of a number as found in an xlsx file.
+        :rtype: str
+        '''
+        return "%.16g" % float(number)
+
+
+class Chassis_XlsxReader():
+
+    '''
+    Minimal reader of xlsx files, that extracts the cell values of worksheets into :class:`Chassis_WorksheetTable`
+    objects. It only relies on the Python standard library, and ignores formatting, since the test harness only
+    compares values.
+
+    :param str path: absolute path to an xlsx file
+    '''
+    def __init__(self, path):
+        self.path                                   = path
+
+    NS_MAIN                                         = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+    NS_DOC_RELS                                     = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+    NS_PACKAGE_RELS                                 = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+    def read(self, worksheet_names=None):
+        '''
+        Returns a dictionary whose keys are worksheet names and whose values are the corresponding
+        :class:`Chassis_WorksheetTable` objects.
+
+        :param list[str] worksheet_names: names of the worksheets to read. If None, all worksheets are read.
+            Names for which there is no worksheet are ignored.
+        :rtype: dict
+        '''
+        with zipfile.ZipFile(self.path) as xlsx:
+            shared_string_l                         = self._shared_strings(xlsx)
+            result_dict                             = {}
+            for name, member in self._worksheet_members(xlsx).items():
+                if worksheet_names is None or name in worksheet_names:
+                    result_dict[name]               = self._read_worksheet(xlsx, member, shared_string_l)
+        return result_dict
+
+    def _worksheet_members(self, xlsx):
+        '''
+        Returns a dictionary mapping the name of each worksheet to the member of the `xlsx` zip file that holds it
+        '''
+        workbook                                    = _ET.fromstring(xlsx.read("xl/workbook.xml"))
+        relationships                               = _ET.fromstring(xlsx.read("xl/_rels/workbook.xml.rels"))
+        target_dict                                 = {r.get("Id"): r.get("Target")
+                                                       for r in relationships.iter(self.NS_PACKAGE_RELS + "Relationship")}
+        result_dict                                 = {}
+        for sheet in workbook.iter(self.NS_MAIN + "sheet"):
+            target                                  = target_dict[sheet.get(self.NS_DOC_RELS + "id")]
+            if target.startswith("/"):
+                member                              = target[1:]
+            else:
+                member                              = posixpath.normpath(f"xl/{target}")
+            result_dict[sheet.get("name")]          = member
+        return result_dict
+
+    def _shared_strings(self, xlsx):
+        if not "xl/sharedStrings.xml" in xlsx.namelist():
+            return []
+        root                                        = _ET.fromstring(xlsx.read("xl/sharedStrings.xml"))
+        return [self._text(si) for si in root.iter(self.NS_MAIN + "si")]
+
+    # Characters that can't be written as such in the XML of a workbook are escaped as "_xHHHH_", where HHHH is
+    # the character's code in hexadecimal. So text that looks like an escape is itself escaped, as "_x005F_xHHHH_"
+    #
+    ESCAPE_PATTERN                                  = re.compile("_x([0-9A-Fa-f]{4})_")
+
+    def _text(self, element):
+        '''
+        Returns the concatenation of all the text runs under `element`, which may be plain or rich text, with
+        "_xHHHH_" escapes decoded
+        '''
+        text                                        = "".join(t.text or "" for t in element.iter(self.NS_MAIN + "t"))
+        return self.ESCAPE_PATTERN.sub(lambda match: chr(int(match.group(1), 16)), text)
+
+    def _read_worksheet(self, xlsx, member, shared_string_l):
+        rows_dict                                   = {}
+        with xlsx.open(member) as stream:
+            for _, element in _ET.iterparse(stream):
+                if element.tag != self.NS_MAIN + "c":
+                    continue
+                value                               = self._cell_value(element, shared_string_l)
+                if value is not None:
+                    row, col                        = self._cell_position(element.get("r"))
+                    rows_dict.setdefault(row, {})[col] = value
+                element.clear()
+        return Chassis_WorksheetTable.build(rows_dict)
+
+    def _cell_value(self, element, shared_string_l):
+        cell_type                                   = element.get("t", "n")
+        if cell_type == "inlineStr":
+            inline                                  = element.find(self.NS_MAIN + "is")
+            return None if inline is None else self._text(inline)
+        v                                           = element.find(self.NS_MAIN + "v")
+        if v is None or v.text is None:
+            return None
+        if cell_type == "s":
+            return shared_string_l[int(v.text)]
+        if cell_type == "n":
+            return Chassis_WorksheetTable.normalize_number(v.text)
+        # Booleans ("1" or "0"), errors, and cached results of string formulas are kept as they are
+        return v.text
+
+    def _cell_position(self, reference):
+        '''
+        Returns the 0-based (row, col) of a cell given its Excel `reference`, such as "C7"
+        '''
+        col                                         = 0
+        idx                                         = 0
+        while reference[idx].isalpha():
+            col                                     = col * 26 + ord(reference[idx].upper()) - ord("A") + 1
+            idx                                     += 1
+        return int(reference[idx:]) - 1, col - 1
@@ -41,16 +41,19 @@ class TestProjectCreator(RepoManipulationTestCase):
                                                                             gh_secrets_path        = None)
             
             with asyncio.Runner() as runner:
-                repo_bundle                                 = runner.run(admin.create_project(
+                with ctx.phase("create_project"):
+                    repo_bundle                             = runner.run(admin.create_project(
                                                                             project_name            = TEST_PROJECT,
                                                                             work_branch_name        = "bar-dev"))
 
                 admin.repo_bundle                           = repo_bundle
 
-                runner.run(admin.create_repo_report(    publications_folder         = ctx.manifest.path_to_actuals(), 
+                with ctx.phase("create_repo_report"):
+                    runner.run(admin.create_repo_report(publications_folder         = ctx.manifest.path_to_actuals(), 
                                                         mask_nondeterministic_data  = True))
 
-            self.assert_database_structure(ctx, excels_to_compare)       
+            with ctx.phase("assert_database_structure"):
+                self.assert_database_structure(ctx, excels_to_compare)       
 
 
 
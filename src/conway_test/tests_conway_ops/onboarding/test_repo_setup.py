@@ -38,28 +38,31 @@ class TestRepoSetup(RepoManipulationTestCase):
                 project                                     = ConwayTestUtils.project_name(ctx.scenario_id)
                 excels_to_compare.addXL_RepoStats(project)
 
-                sdlc_root                                   = f"{ctx.manifest.path_to_seed()}/sdlc_root"
+                sdlc_root                                   = ctx.manifest.path_to_sdlc_root()
 
                 local_repos_root                            = ctx.test_database.local_repos_hub.hub_root()
                 remote_repos_root                           = ctx.test_database.remote_repos_hub.hub_root()
 
                 # Pre-flight: create the repos in question
-                creation_result                             = self._create_github_repos(ctx)
+                with ctx.phase("create_github_repos"):
+                    creation_result                         = self._create_github_repos(ctx)
 
-                # Now we can do the test: setup local repos that are cloned from GitHub
+                # Now we can do the test: setup local repos that are cloned from GitHub (or from local bare repos
+                # standing in for GitHub, if the manifest virtualized the remote)
                 #
                 admin                                       = RepoSetup(sdlc_root       = sdlc_root,
                                                                         profile_name    = self.profile_name)
                 
                 # Create the local development environment
-                runner.run(admin.setup(project))                
+                with ctx.phase("repo_setup"):
+                    runner.run(admin.setup(project))                
 
                 # Before we create the branch manager, we will need a scenario-specific RepoBundle class
                 # to be added, since it will be instantiated when we later call self._branch_manager(ctx)
                 #
                 # So we copy a previously prepared class to the ops repo:
                 #
-                with Profiler("Creating branch report"):
+                with Profiler("Creating branch report"), ctx.phase("create_repo_report"):
                     with DataAccessor(url = f"{local_repos_root}") as ax:
                         ax.copy_from(src_url=f"{ctx.manifest.path_to_seed()}/files_to_add")
 
@@ -70,7 +73,8 @@ class TestRepoSetup(RepoManipulationTestCase):
                                             publications_folder             = ctx.manifest.path_to_actuals(), 
                                             mask_nondeterministic_data      = True))
 
-                self.assert_database_structure(ctx, excels_to_compare)  
+                with ctx.phase("assert_database_structure"):
+                    self.assert_database_structure(ctx, excels_to_compare)  
 
     def _branch_manager(self, ctx):
         '''
@@ -1,5 +1,8 @@
 import abc
 import asyncio
+import os                                                           as _os
+import shutil
+import subprocess
 
 from conway.async_utils.scheduling_context                          import SchedulingContext
 from conway.async_utils.ushering_to                                 import UsheringTo
@@ -12,6 +15,9 @@ from conway_ops.onboarding.user_profile                             import UserP
 from conway_ops.util.git_branches                                   import GitBranches
 from conway_ops.util.github_client                                  import GitHub_Client
 
+from conway_test.framework.test_logic.chassis_excels_to_compare     import Chassis_ExcelsToCompare
+from conway_test.framework.test_logic.chassis_worksheet_table       import Chassis_XlsxReader
+
 # GOTCHA
 #
 # Multiple inheritance is not ideal, and here we use it only in a "soft way". The "real parent class" for us is
@@ -37,6 +43,9 @@ class RepoManipulationTestCase(AcceptanceTestCase, abc.ABC):
 
         self.profile_name                           = "TestRobot@CCL"
 
+        # Relative paths of files that `_get_files` should leave out, e.g., Excel reports compared in memory
+        self._files_to_ignore                       = []
+
     def _create_github_repos(self, ctx):
         '''
         Creates a collection of GitHub repos for the test case identified by `ctx.scenario_id`, 
@@ -55,7 +64,10 @@ class RepoManipulationTestCase(AcceptanceTestCase, abc.ABC):
           would be `scenario_8002` and the profile is expected to define what repos belong to that project.
 
         The user configuration is identified by the name `self.profile_name` and it must reside in the local 
-        file system under a folder defined by `ctx.manifest.path_to_seed()`.
+        file system under a folder defined by `ctx.manifest.path_to_sdlc_root()`.
+
+        If the manifest has virtualized the GitHub remote (see :class:`OperatorScenarioManifest`), the repos are
+        instead created as local bare repos, by delegating to `self._create_local_bare_repos(ctx)`.
 
         :param Chassis_TestContext ctx: context manager controlling the environmental settings under which a particular
             test is running.
@@ -63,11 +75,75 @@ class RepoManipulationTestCase(AcceptanceTestCase, abc.ABC):
         :returns: the status from GitHub, as a JSON dictionary, on the attempt to create the GitRepo `repo_name`.
         :rtype: dict
         '''
+        if ctx.manifest.virtualized_remote:
+            return self._create_local_bare_repos(ctx)
         return asyncio.run(self._supervisor(ctx))
 
+    def _create_local_bare_repos(self, ctx):
+        '''
+        Local counterpart of `self._create_github_repos(ctx)`, used when the manifest has virtualized the GitHub
+        remote. For each repo in the project it creates a bare repo under the profile's remote root with the same
+        content GitHub would create: a first commit with a README on the master branch, and an integration
+        branch pointing to that same commit.
+
+        All pre-existing bare repos under the remote root are removed first, including those of other projects,
+        since the remote root is shared by all runs of the scenario and whatever earlier runs pushed to it must not
+        leak into this one.
+
+        :param Chassis_TestContext ctx: context manager controlling the environmental settings under which a particular
+            test is running.
+
+        :returns: the names of the repos created
+        :rtype: list[str]
+        '''
+        P                                           = ctx.manifest.profile
+        project_name                                = f"scenario_{ctx.scenario_id}"
+        integration                                 = GitBranches.INTEGRATION_BRANCH.value
+
+        # Fixed identity and dates, so that the commits are the same in every run
+        git_env                                     = dict(_os.environ,
+                                                           GIT_AUTHOR_NAME      = P.USER,
+                                                           GIT_AUTHOR_EMAIL     = f"{P.USER}@localhost",
+                                                           GIT_AUTHOR_DATE      = "2000-01-01T00:00:00Z",
+                                                           GIT_COMMITTER_NAME   = P.USER,
+                                                           GIT_COMMITTER_EMAIL  = f"{P.USER}@localhost",
+                                                           GIT_COMMITTER_DATE   = "2000-01-01T00:00:00Z")
+        def git(repo_path, *args, input=""):
+            completion                              = subprocess.run(["git", *args], 
+                                                                     cwd                = repo_path,
+                                                                     env                = git_env,
+                                                                     input              = input,
+                                                                     capture_output     = True,
+                                                                     text               = True,
+                                                                     check              = True)
+            return completion.stdout.strip()
+
+        if _os.path.exists(P.REMOTE_ROOT):
+            shutil.rmtree(P.REMOTE_ROOT)
+            Logger.log_info(f"Removed pre-existing local bare repos under '{P.REMOTE_ROOT}' so we can re-create them")
+
+        result_l                                    = []
+        for repo_name in P.REPO_LIST(project_name):
+            repo_path                               = f"{P.REMOTE_ROOT}/{repo_name}"
+            _os.makedirs(repo_path)
+            git(repo_path, "init", "--bare", "--quiet")
+            git(repo_path, "symbolic-ref", "HEAD", "refs/heads/master")
+
+            readme                                  = git(repo_path, "hash-object", "-w", "--stdin",
+                                                          input = f"# {repo_name}\nRepo used as a fixture by Conway tests\n")
+            tree                                    = git(repo_path, "mktree", input = f"100644 blob {readme}\tREADME.md\n")
+            commit                                  = git(repo_path, "commit-tree", tree, "-m", "Initial commit")
+            git(repo_path, "update-ref", "refs/heads/master", commit)
+            git(repo_path, "update-ref", f"refs/heads/{integration}", commit)
+
+            Logger.log_info(f"Created local bare repo '{repo_name}' with '{integration}' branch under {P.REMOTE_ROOT}")
+            result_l.append(repo_name)
+
+        return result_l
+
     async def _supervisor(self, ctx):
 
-        sdlc_root                                   = f"{ctx.manifest.path_to_seed()}/sdlc_root"
+        sdlc_root                                   = ctx.manifest.path_to_sdlc_root()
         profile_path                                = f"{sdlc_root}/sdlc.profiles/{self.profile_name}/profile.toml" 
         P                                           = UserProfile(profile_path)  
 
@@ -207,15 +283,137 @@ class RepoManipulationTestCase(AcceptanceTestCase, abc.ABC):
        
        
 
+    def assert_database_structure(self, ctx, excels_to_compare):
+        '''
+        Overwrites parent so that, if `ctx` has a cache of expected Excel worksheets, captures reports in memory,
+        or has a file comparison engine, the worksheets in `excels_to_compare` are compared by the harness itself:
+
+        * With a cache, the expected side is loaded from the cache instead of being parsed
+        * When capturing reports in memory, the actual side is the data captured before serialization.
+
+        Since the worksheets were compared, the corresponding xlsx files are left out of the comparison of the rest of
+        the database structure (when capturing reports in memory, they are only written if the comparison fails).
+
+        The rest of the database structure is then checked by the parent or, if `ctx` has a file comparison
+        engine, by `self._assert_files(--)`.
+
+        :param Chassis_TestContext ctx: the context under which a test case is running
+        :param Chassis_ExcelsToCompare excels_to_compare: the Excel files and worksheets to compare
+        '''
+        if ctx.excel_cache is None and ctx.report_capture is None and ctx.file_comparison_engine is None:
+            super().assert_database_structure(ctx, excels_to_compare)
+            return
+
+        self._assert_excels(ctx, excels_to_compare)
+
+        # Excels were already compared worksheet by worksheet, so the rest of the assertion should not compare them
+        # again, least of all byte by byte, since xlsxwriter doesn't write the same bytes for the same workbook
+        #
+        self._files_to_ignore                       = [relative_path for relative_path in excels_to_compare.worksheets_dict]
+        try:
+            if ctx.file_comparison_engine is not None:
+                self._assert_files(ctx, excels_to_compare)
+            else:
+                super().assert_database_structure(ctx, Chassis_ExcelsToCompare())
+        finally:
+            self._files_to_ignore                   = []
+
+    def _assert_files(self, ctx, excels_to_compare):
+        '''
+        Asserts that the actuals and the expected output have the same files (as listed by `self._get_files`), with
+        the same content, using `ctx.file_comparison_engine` to compare them in parallel. Excel files in 
+        `excels_to_compare` must exist on both sides, but their content is not compared byte by byte, since it is
+        compared worksheet by worksheet by `self._assert_excels(--)`.
+
+        :param Chassis_TestContext ctx: the context under which a test case is running
+        :param Chassis_ExcelsToCompare excels_to_compare: the Excel files that were already compared
+        '''
+        actual_root                                 = ctx.manifest.path_to_actuals()
+        expected_root                               = ctx.manifest.path_to_expected()
+
+        actual_files                                = set(self._relative_files(actual_root))
+        expected_files                              = set(self._relative_files(expected_root))
+        difference_l                                = sorted([(f, "missing in actual") for f in expected_files - actual_files]
+                                                        + [(f, "missing in expected") for f in actual_files - expected_files])
+
+        # With fail-fast, report only the first difference, whether it is in the file listings or in the contents
+        #
+        if ctx.file_comparison_engine.fail_fast and len(difference_l) > 0:
+            difference_l                            = difference_l[:1]
+        else:
+            excel_files                             = [p.lstrip("/") for p in excels_to_compare.worksheets_dict]
+            common_files                            = [f for f in actual_files & expected_files if not f in excel_files]
+            difference_l                            += ctx.file_comparison_engine.compare(actual_root, expected_root,
+                                                                                          common_files)
+        if len(difference_l) > 0:
+            self.fail(f"Database structure differs from expected in {len(difference_l)} file(s):\n\t"
+                      + "\n\t".join(f"{f}: {description}" for f, description in sorted(difference_l)))
+
+    def _relative_files(self, root_folder):
+        '''
+        Returns the files listed by `self._get_files(root_folder)`, as paths relative to `root_folder`
+        '''
+        return [_os.path.relpath(f, root_folder) if _os.path.isabs(f) else f for f in self._get_files(root_folder)]
+
+    def _assert_excels(self, ctx, excels_to_compare):
+        '''
+        Asserts that each worksheet in `excels_to_compare` has the same values in the actual Excel file as in the
+        expected one. The actual worksheets are taken from `ctx.report_capture` if there is one, in which case
+        each workbook must have been captured there, and the expected ones from `ctx.excel_cache` if there is
+        one. Otherwise they are parsed from the xlsx files.
+
+        If a captured workbook has differences, it is written to the file system so that it can be inspected.
+
+        :param Chassis_TestContext ctx: the context under which a test case is running
+        :param Chassis_ExcelsToCompare excels_to_compare: the Excel files and worksheets to compare
+        '''
+        for relative_path, worksheet_l in excels_to_compare.worksheets_dict.items():
+            actual_path                             = ctx.manifest.path_to_actuals() + relative_path
+            expected_path                           = ctx.manifest.path_to_expected() + relative_path
+
+            if ctx.report_capture is not None:
+                actual_tables_dict                  = ctx.report_capture.tables(actual_path)
+                if actual_tables_dict is None:
+                    self.fail(f"Workbook '{relative_path}' was not captured in memory. Workbooks written without "
+                              + "being captured: " + (", ".join(ctx.report_capture.uncaptured_l) or "none"))
+            else:
+                actual_tables_dict                  = Chassis_XlsxReader(actual_path).read([w for w, _ in worksheet_l])
+
+            if ctx.excel_cache is not None:
+                expected_tables_dict                = ctx.excel_cache.workbook(expected_path)
+            else:
+                expected_tables_dict                = Chassis_XlsxReader(expected_path).read([w for w, _ in worksheet_l])
+
+            for worksheet, is_optional in worksheet_l:
+                actual                              = actual_tables_dict.get(worksheet)
+                expected                            = expected_tables_dict.get(worksheet)
+                if actual is None and expected is None and is_optional:
+                    continue
+                difference_l                        = []
+                if expected is None:
+                    difference_l                    = [f"Worksheet is missing in expected '{expected_path}'"]
+                elif actual is None:
+                    difference_l                    = [f"Worksheet is missing in actual '{actual_path}'"]
+                else:
+                    difference_l                    = actual.differences(expected)
+
+                if len(difference_l) > 0:
+                    if ctx.report_capture is not None:
+                        ctx.report_capture.flush(actual_path)
+                    self.fail(f"Worksheet '{worksheet}' of '{relative_path}' differs from expected:\n\t"
+                              + "\n\t".join(difference_l))
+
     def _get_files(self, root_folder):
         '''
         Overwrites parent to ignore files inside a ".git" folder, since GIT appears to use a non-deterministic
-        way to hash objects
+        way to hash objects. Also ignores files in `self._files_to_ignore`.
 
         @param root_folder A string representing the root of a folder structure
         '''
         all_files_l                                     = super()._get_files(root_folder)
 
         files_l                                         = [f for f in all_files_l if not ".git" in f.split("/")]
+        for relative_path in self._files_to_ignore:
+            files_l                                     = [f for f in files_l if not f.endswith(relative_path.lstrip("/"))]
 
         return files_l
\ No newline at end of file
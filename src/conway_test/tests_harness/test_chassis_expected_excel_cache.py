@@ -0,0 +1,161 @@
+import os                                                                   as _os
+import sys                                                                  as _sys
+import tempfile
+import unittest
+
+import xlsxwriter
+
+from conway_test.framework.test_logic.chassis_expected_excel_cache         import Chassis_ExpectedExcelCache
+from conway_test.framework.test_logic.chassis_worksheet_table              import Chassis_XlsxReader
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl                                                                = None
+
+
+class TestChassisExpectedExcelCache(unittest.TestCase):
+
+    '''
+    Checks that comparing worksheets with ``CONWAY_TEST_CACHE_EXPECTED_EXCELS`` on gives the same results as without
+    it, for workbooks that match and workbooks that don't.
+
+    Without the cache, expected workbooks are compared as parsed from the xlsx files, either by
+    :class:`Chassis_XlsxReader` (when other harness modes are on) or by the ``conway_acceptance`` comparison (when
+    none are), which reads workbooks with openpyxl. So results from the cache are pinned to both, the latter only if
+    openpyxl is installed.
+    '''
+    def setUp(self):
+        self._temp_dir                              = tempfile.TemporaryDirectory()
+        self.root                                   = self._temp_dir.name
+        self.cache                                  = Chassis_ExpectedExcelCache(f"{self.root}/cache")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    # Values of the expected workbook, by worksheet. They cover text that looks like the "_xHHHH_" escapes of the
+    # XML of workbooks, non-ASCII text, numbers whose formatting could differ, booleans and empty cells
+    #
+    VALUES_DICT                                     = {"Summary":   [["Repo",       "Commits",  "Active"],
+                                                                     ["_x0041_",    3,          True],
+                                                                     ["Zürich €",   0.1,        False],
+                                                                     ["a_x00_b",    1e21,       None],
+                                                                     [None,         -2.5,       "1"]],
+                                                       "Empty":     []}
+
+    def test_matching(self):
+        '''
+        Checks that a workbook written twice with the same values has no differences with the cache on, as without it
+        '''
+        expected_path                               = self._write("expected.xlsx", self.VALUES_DICT)
+        actual_path                                 = self._write("actual.xlsx", self.VALUES_DICT)
+
+        for worksheet in self.VALUES_DICT.keys():
+            self.assertEqual(self._cached_differences(actual_path, expected_path, worksheet), [], worksheet)
+            self.assertEqual(self._parsed_differences(actual_path, expected_path, worksheet), [], worksheet)
+            if openpyxl is not None:
+                self.assertTrue(self._openpyxl_matches(actual_path, expected_path, worksheet), worksheet)
+
+    def test_mismatching(self):
+        '''
+        Checks that workbooks with different values have the same differences with the cache on as without it
+        '''
+        # Differences in type alone (e.g., the number 3 vs. the text "3") are left out, since worksheet tables hold
+        # every value as a string
+        #
+        expected_path                               = self._write("expected.xlsx", self.VALUES_DICT)
+        for description, row, col, value in [("text vs. escape",      1,  0,  "A"),
+                                             ("number",               2,  1,  0.2),
+                                             ("boolean",              1,  2,  False),
+                                             ("empty vs. value",      3,  2,  0),
+                                             ("extra row",            5,  0,  "x")]:
+            values_dict                             = {name: [list(r) for r in rows] for name, rows in self.VALUES_DICT.items()}
+            rows                                    = values_dict["Summary"]
+            while len(rows) <= row:
+                rows.append([])
+            rows[row]                               = rows[row] + [None] * (col + 1 - len(rows[row]))
+            rows[row][col]                          = value
+            actual_path                             = self._write(f"actual_{row}_{col}.xlsx", values_dict)
+
+            cached_l                                = self._cached_differences(actual_path, expected_path, "Summary")
+            self.assertEqual(len(cached_l), 1, description)
+            self.assertEqual(cached_l, self._parsed_differences(actual_path, expected_path, "Summary"), description)
+            if openpyxl is not None:
+                self.assertFalse(self._openpyxl_matches(actual_path, expected_path, "Summary"), description)
+
+    def test_escapes(self):
+        '''
+        Checks that text that looks like an escape is read as written
+        '''
+        path                                        = self._write("escapes.xlsx", self.VALUES_DICT)
+        self.assertEqual(self.cache.worksheet(path, "Summary").cell(1, 0), "_x0041_")
+        self.assertEqual(Chassis_XlsxReader(path).read()["Summary"].cell(1, 0), "_x0041_")
+        if openpyxl is not None:
+            self.assertEqual(openpyxl.load_workbook(path)["Summary"]["A2"].value, "_x0041_")
+
+    def test_rewritten_in_place(self):
+        '''
+        Checks that a workbook rewritten with other values is loaded again, even if its size and modification time
+        are kept, as happens when a cell's text changes for another of the same length
+        '''
+        path                                        = self._write("expected.xlsx", {"Summary": [["Repo"]]})
+        stat                                        = _os.stat(path)
+        self.assertEqual(self.cache.workbook(path)["Summary"].cell(0, 0), "Repo")
+
+        self._write("expected.xlsx", {"Summary": [["Rapo"]]})
+        _os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(_os.stat(path).st_size, stat.st_size)
+        self.assertEqual(self.cache.workbook(path)["Summary"].cell(0, 0), "Rapo")
+        self.assertEqual(self.cache.worksheet(path, "Summary").cell(0, 0), "Rapo")
+
+    def _write(self, file_name, values_dict):
+        '''
+        Writes an xlsx file called `file_name` with the values in `values_dict`, and returns its absolute path
+        '''
+        path                                        = f"{self.root}/{file_name}"
+        workbook                                    = xlsxwriter.Workbook(path)
+        for name, rows in values_dict.items():
+            worksheet                               = workbook.add_worksheet(name)
+            for row, values in enumerate(rows):
+                for col, value in enumerate(values):
+                    if value is not None:
+                        worksheet.write(row, col, value)
+        workbook.close()
+        return path
+
+    def _cached_differences(self, actual_path, expected_path, worksheet):
+        '''
+        Returns the differences of a worksheet as found with the cache on (by a fresh cache, and then by the same
+        cache once the workbook is loaded, since the first and later loads take different code paths)
+        '''
+        fresh_l                                     = Chassis_XlsxReader(actual_path).read()[worksheet].differences(
+                                                            Chassis_ExpectedExcelCache(f"{self.root}/cache").worksheet(expected_path, worksheet))
+        warm_l                                      = Chassis_XlsxReader(actual_path).read()[worksheet].differences(
+                                                            self.cache.worksheet(expected_path, worksheet))
+        self.assertEqual(fresh_l, warm_l)
+        return warm_l
+
+    def _parsed_differences(self, actual_path, expected_path, worksheet):
+        '''
+        Returns the differences of a worksheet as found with the cache off
+        '''
+        return Chassis_XlsxReader(actual_path).read()[worksheet].differences(
+                                                            Chassis_XlsxReader(expected_path).read()[worksheet])
+
+    def _openpyxl_matches(self, actual_path, expected_path, worksheet):
+        '''
+        Returns True if a worksheet has the same values in both workbooks when they are read with openpyxl
+        '''
+        values_l                                    = []
+        for path in [actual_path, expected_path]:
+            rows_dict                               = {}
+            for row in openpyxl.load_workbook(path)[worksheet].iter_rows():
+                for cell in row:
+                    if cell.value is not None:
+                        rows_dict.setdefault(cell.row, {})[cell.column] = (type(cell.value), cell.value)
+            values_l.append(rows_dict)
+        return values_l[0] == values_l[1]
+
+
+if __name__ == "__main__":
+    unittest.main(argv=_sys.argv)
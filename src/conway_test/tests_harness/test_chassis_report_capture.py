@@ -0,0 +1,101 @@
+import datetime
+import io
+import sys                                                                  as _sys
+import tempfile
+import unittest
+
+import xlsxwriter
+
+from conway_test.framework.test_logic.chassis_report_capture               import Chassis_ReportCapture
+from conway_test.framework.test_logic.chassis_worksheet_table              import Chassis_XlsxReader
+
+
+class TestChassisReportCapture(unittest.TestCase):
+
+    '''
+    Checks that the worksheets captured in memory by :class:`Chassis_ReportCapture` have the same values as those
+    parsed back from the xlsx files, so that ``CONWAY_TEST_IN_MEMORY_REPORTS`` doesn't change which tests pass.
+    '''
+    def setUp(self):
+        self._temp_dir                              = tempfile.TemporaryDirectory()
+        self.root                                   = self._temp_dir.name
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_capture_vs_disk(self):
+        '''
+        Checks that a workbook written to a path has the same values when captured as when read from disk
+        '''
+        path                                        = f"{self.root}/report.xlsx"
+        with Chassis_ReportCapture() as capture:
+            self._write(xlsxwriter.Workbook(path))
+            captured_dict                           = capture.tables(path)
+            capture.flush(path)
+
+        self.assertIsNotNone(captured_dict)
+        self.assertEqual(capture.uncaptured_l, [])
+        self._assert_same(captured_dict, Chassis_XlsxReader(path).read())
+
+    def test_file_handle(self):
+        '''
+        Checks that a workbook written to a file handle, as pandas does, is captured under the file's name and also
+        written right away
+        '''
+        path                                        = f"{self.root}/handle.xlsx"
+        with Chassis_ReportCapture() as capture:
+            with open(path, "wb") as file:
+                self._write(xlsxwriter.Workbook(file))
+            captured_dict                           = capture.tables(path)
+            uncaptured_l                            = list(capture.uncaptured_l)
+
+        self.assertIsNotNone(captured_dict)
+        self.assertEqual(uncaptured_l, [])
+        self._assert_same(captured_dict, Chassis_XlsxReader(path).read())
+
+    def test_uncaptured(self):
+        '''
+        Checks that workbooks that can't be captured are written as usual and listed as uncaptured
+        '''
+        path                                        = f"{self.root}/constant_memory.xlsx"
+        buffer                                      = io.BytesIO()
+        with Chassis_ReportCapture() as capture:
+            self._write(xlsxwriter.Workbook(path, {"constant_memory": True}))
+            self._write(xlsxwriter.Workbook(buffer))
+            self.assertIsNone(capture.tables(path))
+            self.assertEqual(len(capture.uncaptured_l), 2)
+
+        self.assertIn("Summary", Chassis_XlsxReader(path).read())
+        self.assertGreater(len(buffer.getvalue()), 0)
+
+    def _write(self, workbook):
+        '''
+        Writes to `workbook` cells of every kind that reports may have, and closes it
+        '''
+        bold                                        = workbook.add_format({"bold": True})
+        date_format                                 = workbook.add_format({"num_format": "yyyy-mm-dd"})
+        worksheet                                   = workbook.add_worksheet("Summary")
+        worksheet.write_row(0, 0, ["Repo", "Commits", "Active", "Since", "Total"], bold)
+        for row, (repo, commits, active) in enumerate([("_x0041_", 3, True), ("Zürich €", 0.1, False),
+                                                       ("a\tb", -2.5e-7, True)], start=1):
+            worksheet.write_row(row, 0, [repo, commits, active])
+            worksheet.write_datetime(row, 3, datetime.datetime(2024, 2, row), date_format)
+            worksheet.write_formula(row, 4, f"=B{row + 1}*2", None, commits * 2)
+        worksheet.write_rich_string(4, 0, "plain ", bold, "bold", " tail")
+        worksheet.write_blank(4, 1, None, bold)
+        worksheet.write_formula(4, 4, '="x"&"y"', None, "xy")
+        workbook.add_worksheet("Empty")
+        workbook.close()
+
+    def _assert_same(self, captured_dict, parsed_dict):
+        '''
+        Asserts that two dictionaries of worksheet tables have the same worksheets, with the same values
+        '''
+        self.assertEqual(sorted(captured_dict.keys()), sorted(parsed_dict.keys()))
+        for name, parsed in parsed_dict.items():
+            self.assertEqual(captured_dict[name].differences(parsed), [], name)
+            self.assertEqual(parsed.differences(captured_dict[name]), [], name)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=_sys.argv)
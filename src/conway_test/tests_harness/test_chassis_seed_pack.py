@@ -0,0 +1,107 @@
+import filecmp
+import os                                                                   as _os
+import stat                                                                 as _stat
+import sys                                                                  as _sys
+import tempfile
+import unittest
+
+from conway_test.framework.test_database.chassis_seed_pack                 import Chassis_SeedPack
+
+
+class TestChassisSeedPack(unittest.TestCase):
+
+    '''
+    Round-trip checks for the :class:`Chassis_SeedPack` format: a seed folder is packed, and then folders are looked
+    up and extracted from the pack and compared with the original.
+
+    Unlike the test cases in ``conway_test.tests_conway_ops``, these don't need a scenarios repo, since they check
+    the harness itself rather than code under test.
+    '''
+    def setUp(self):
+        self._temp_dir                              = tempfile.TemporaryDirectory()
+        self.root                                   = self._temp_dir.name
+        self.seed_folder                            = f"{self.root}/SEED@T0"
+        self.pack_path                              = self.seed_folder + Chassis_SeedPack.SUFFIX
+
+        # Folder names chosen to sort right around "hub/" as bytes: "-" and "." sort before "/", "0" right after it
+        #
+        for relative_path, content in [("hub/a.txt",                    b"a"),
+                                       ("hub/empty.txt",                b""),
+                                       ("hub/repo/.git/objects/ab/cd",  b"object"),
+                                       ("hub/repo/large.bin",           _os.urandom(3 * Chassis_SeedPack.READ_SIZE // 2)),
+                                       ("hub/skipped/b.txt",            b"b"),
+                                       ("hub-x/c.txt",                  b"c"),
+                                       ("hub.x/d.txt",                  b"d"),
+                                       ("hub0/e.txt",                   b"e"),
+                                       ("other/f.txt",                  b"f")]:
+            path                                    = f"{self.seed_folder}/{relative_path}"
+            _os.makedirs(_os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as file:
+                file.write(content)
+        _os.makedirs(f"{self.seed_folder}/hub/empty_folder")
+        _os.symlink("a.txt", f"{self.seed_folder}/hub/link")
+
+        # Read-only, as GIT objects are
+        _os.chmod(f"{self.seed_folder}/hub/repo/.git/objects/ab/cd", 0o444)
+
+        Chassis_SeedPack.pack(self.seed_folder, self.pack_path)
+        self.seed_pack                              = Chassis_SeedPack(self.pack_path)
+
+    def tearDown(self):
+        for parent, folder_l, file_l in _os.walk(self.root):
+            for name in folder_l + file_l:
+                path                                = _os.path.join(parent, name)
+                if not _os.path.islink(path):
+                    _os.chmod(path, 0o700)
+        self._temp_dir.cleanup()
+
+    def test_range(self):
+        '''
+        Checks that the index entries for a folder are exactly those under it, and none of its byte-wise neighbors
+        '''
+        for folder in ["hub", "hub-x", "hub.x", "hub0", "hub/repo", "other", "missing"]:
+            start, end                              = self.seed_pack._range(folder)
+            name_l                                  = [self.seed_pack._entry(idx)[0] for idx in range(start, end)]
+            expected_l                              = sorted(self._relative_paths(f"{self.seed_folder}/{folder}"),
+                                                             key=lambda p: p.encode("utf-8"))
+            self.assertEqual(name_l, [f"{folder}/{p}" for p in expected_l], folder)
+
+    def test_extract(self):
+        '''
+        Checks that extracting a folder with exclusions recreates it, including symbolic links, empty files and
+        folders, and file modes, and that extracting it again overwrites read-only files
+        '''
+        destination                                 = f"{self.root}/actuals/hub"
+        for _ in range(2):
+            nb_files                                = self.seed_pack.extract("hub", destination, exclude=["skipped"])
+
+        self.assertEqual(nb_files, 4)
+        self.assertEqual(self._relative_paths(destination),
+                         [p for p in self._relative_paths(f"{self.seed_folder}/hub") if not p.startswith("skipped")])
+        self.assertEqual(_os.readlink(f"{destination}/link"), "a.txt")
+        for relative_path in ["a.txt", "empty.txt", "repo/.git/objects/ab/cd", "repo/large.bin"]:
+            self.assertTrue(filecmp.cmp(f"{self.seed_folder}/hub/{relative_path}", f"{destination}/{relative_path}",
+                                        shallow=False), relative_path)
+        self.assertEqual(_stat.S_IMODE(_os.stat(f"{destination}/repo/.git/objects/ab/cd").st_mode), 0o444)
+
+    def test_extract_all(self):
+        '''
+        Checks that extracting the empty relative path recreates the whole seed
+        '''
+        destination                                 = f"{self.root}/unpacked"
+        self.seed_pack.extract("", destination)
+        self.assertEqual(self._relative_paths(destination), self._relative_paths(self.seed_folder))
+
+    def _relative_paths(self, folder):
+        '''
+        Returns the sorted relative paths of all files, folders and symbolic links under `folder`
+        '''
+        result_l                                    = []
+        for parent, folder_l, file_l in _os.walk(folder):
+            for name in folder_l + file_l:
+                result_l.append(_os.path.relpath(_os.path.join(parent, name), folder).replace(_os.sep, "/"))
+        return sorted(result_l)
+
+
+if __name__ == "__main__":
+    unittest.main(argv=_sys.argv)
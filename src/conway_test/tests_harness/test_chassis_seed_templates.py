@@ -0,0 +1,71 @@
+import os                                                                   as _os
+import sys                                                                  as _sys
+import tempfile
+import unittest
+
+from conway_test.framework.test_database.chassis_seed_templates             import Chassis_SeedTemplates
+
+
+class TestChassisSeedTemplates(unittest.TestCase):
+
+    '''
+    Checks that :class:`Chassis_SeedTemplates` restores the content saved for a seed, only while the seed is
+    unchanged.
+    '''
+    def setUp(self):
+        self._temp_dir                              = tempfile.TemporaryDirectory()
+        self.root                                   = self._temp_dir.name
+        self.seed_hub_folder                        = f"{self.root}/SEED@T0/bundled_repos_local"
+        self.hub_root                               = f"{self.root}/ACTUALS/bundled_repos_local"
+        self.store                                  = Chassis_SeedTemplates(f"{self.root}/templates")
+
+        self._write(f"{self.seed_hub_folder}/repo/README.md", "seed")
+
+    def tearDown(self):
+        self._temp_dir.cleanup()
+
+    def test_round_trip(self):
+        '''
+        Checks that a saved template replaces whatever is in the hub when restored
+        '''
+        self.assertFalse(self.store.restore(self.seed_hub_folder, self.hub_root))
+
+        self._write(f"{self.hub_root}/repo/README.md", "populated")
+        self.store.save(self.seed_hub_folder, self.hub_root)
+        self._write(f"{self.hub_root}/repo/README.md", "modified by a test")
+        self._write(f"{self.hub_root}/repo/extra.txt", "added by a test")
+
+        self.assertTrue(self.store.restore(self.seed_hub_folder, self.hub_root))
+        self.assertEqual(sorted(_os.listdir(f"{self.hub_root}/repo")), ["README.md"])
+        self.assertEqual(self._read(f"{self.hub_root}/repo/README.md"), "populated")
+
+    def test_seed_changed(self):
+        '''
+        Checks that a template is not used once a file is added to the seed
+        '''
+        self._write(f"{self.hub_root}/repo/README.md", "populated")
+        self.store.save(self.seed_hub_folder, self.hub_root)
+
+        self._write(f"{self.seed_hub_folder}/repo/other.txt", "new in the seed")
+        self.assertFalse(self.store.restore(self.seed_hub_folder, self.hub_root))
+
+    def test_missing_hub_root(self):
+        '''
+        Checks that saving a hub that was not created, because the seed had nothing for it, does nothing
+        '''
+        self.store.save(self.seed_hub_folder, self.hub_root)
+        self.assertFalse(self.store.restore(self.seed_hub_folder, self.hub_root))
+        self.assertFalse(_os.path.exists(self.hub_root))
+
+    def _write(self, path, content):
+        _os.makedirs(_os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as file:
+            file.write(content)
+
+    def _read(self, path):
+        with open(path) as file:
+            return file.read()
+
+
+if __name__ == "__main__":
+    unittest.main(argv=_sys.argv)
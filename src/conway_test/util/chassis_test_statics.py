@@ -26,4 +26,110 @@ class Chassis_TestStatics():
     exist for the purposes of the tests only)
     '''
 
+    # Environment variables through which optional harness modes can be switched on without changing test code.
+    # A mode is on if the variable is set to a "truthy" value, as determined by ConwayTestUtils.is_env_flag_set(--)
+    #
+    PROFILE_MEMORY                                  = "CONWAY_TEST_PROFILE_MEMORY"
+    '''
+    Name of the environment variable that turns on memory profiling in the :class:`Chassis_TestContext`.
+    When on, per-phase peak and retained memory is saved next to the run notes of each test case.
+    '''
+
+    MEMORY_PROFILE_FILE                             = "memory_profile.yaml"
+
+    TRACE_SUBPROCESSES                              = "CONWAY_TEST_TRACE_SUBPROCESSES"
+    '''
+    Name of the environment variable that turns on tracing of subprocesses (mostly GIT commands) in the
+    :class:`Chassis_TestContext`. When on, a report of hot and repeated commands is saved next to the run notes.
+    '''
+
+    MEMOIZE_GIT_QUERIES                             = "CONWAY_TEST_MEMOIZE_GIT_QUERIES"
+    '''
+    Name of the environment variable that turns on memoization of read-only GIT queries within each phase of a
+    test case. Turning it on also turns on subprocess tracing.
+    '''
+
+    SUBPROCESS_TRACE_FILE                           = "subprocess_trace.yaml"
+
+    LOCAL_REMOTE                                    = "CONWAY_TEST_LOCAL_REMOTE"
+    '''
+    Name of the environment variable that turns on the "local remote" mode of the :class:`OperatorScenarioManifest`.
+    In that mode, scenarios whose user profile has remote repos in GitHub run instead against local bare repos
+    with the same owner and repo names, so that they can run entirely on the local disk.
+    '''
+
+    WORK_FOLDER                                     = "CONWAY_TEST_WORK_FOLDER"
+    '''
+    Name of the environment variable that can be used to choose the folder under which the harness keeps
+    generated content that is not part of any scenario (e.g., local remotes, caches). If not set,
+    it defaults to ``~/.cache/conway_test``.
+    '''
+
+    LOCAL_REMOTES_FOLDER                            = "local_remotes"
+
+    CACHE_EXPECTED_EXCELS                           = "CONWAY_TEST_CACHE_EXPECTED_EXCELS"
+    '''
+    Name of the environment variable that turns on the cache of expected Excel worksheets. When on, the harness
+    compares Excel worksheets itself, loading the expected side from a columnar binary cache instead of parsing
+    the expected xlsx files in every run.
+    '''
+
+    EXPECTED_EXCELS_CACHE_FOLDER                    = "expected_excels"
+
+    IN_MEMORY_REPORTS                               = "CONWAY_TEST_IN_MEMORY_REPORTS"
+    '''
+    Name of the environment variable that turns on in-memory comparison of Excel reports. When on, the tabular data
+    of reports is captured before it is serialized and compared directly against the expected worksheets. The xlsx
+    files are only written if the comparison fails, or if the environment variable given by WRITE_REPORTS is set.
+    '''
+
+    WRITE_REPORTS                                   = "CONWAY_TEST_WRITE_REPORTS"
+
+    PARALLEL_FILE_COMPARISON                        = "CONWAY_TEST_PARALLEL_FILE_COMPARISON"
+    '''
+    Name of the environment variable that turns on the harness's own assertion of the database structure, which
+    compares files in parallel with a :class:`Chassis_FileComparisonEngine`. If the environment variable given by
+    FAIL_FAST is also set, the assertion stops at the first difference instead of reporting all of them.
+    '''
+
+    FAIL_FAST                                       = "CONWAY_TEST_FAIL_FAST"
+
+    UNPACKED_SEEDS_FOLDER                           = "unpacked_seeds"
+
+    BACKGROUND_TEARDOWN                             = "CONWAY_TEST_BACKGROUND_TEARDOWN"
+    '''
+    Name of the environment variable that turns on background removal of the prior contents of test databases.
+    When on, prior contents are renamed into the trash folder given by TRASH_FOLDER, under the scenarios repo, and
+    deleted by background threads. The number of threads is given by the environment variable TEARDOWN_WORKERS,
+    and defaults to 2.
+    '''
+
+    TEARDOWN_WORKERS                                = "CONWAY_TEST_TEARDOWN_WORKERS"
+
+    TRASH_FOLDER                                    = ".conway_test_trash"
+
+    DAEMON_SOCKET                                   = "CONWAY_TEST_DAEMON_SOCKET"
+    '''
+    Name of the environment variable that can be used to choose the path of the Unix socket on which the harness
+    daemon listens. If not set, it is the file DAEMON_SOCKET_FILE in the work folder for DAEMON_FOLDER.
+    '''
+
+    DAEMON_FOLDER                                   = "daemon"
+    DAEMON_SOCKET_FILE                              = "harness.sock"
+
+    ARCHIVE_RUNS                                    = "CONWAY_TEST_ARCHIVE_RUNS"
+    '''
+    Name of the environment variable that turns on archiving the actuals and run notes of each test case, when it
+    ends, into the deduplicated run archive kept in the work folder for RUN_ARCHIVE_FOLDER.
+    '''
+
+    RUN_ARCHIVE_FOLDER                              = "run_archive"
+
+    SEED_TEMPLATES                                  = "CONWAY_TEST_SEED_TEMPLATES"
+    '''
+    Name of the environment variable that turns on populating test databases from templates saved by previous
+    seedings from the same seed (loose or packed), kept in the work folder for SEED_TEMPLATES_FOLDER. The harness
+    daemon sets it by default.
+    '''
 
+    SEED_TEMPLATES_FOLDER                           = "seed_templates"
@@ -1,3 +1,6 @@
+import os                                               as _os
+
+from conway_test.util.chassis_test_statics              import Chassis_TestStatics
 
 
 class ConwayTestUtils():
@@ -22,4 +25,62 @@ class ConwayTestUtils():
         :returns: the name of the Conway project for `scenario_id`
         :rtype: str
         '''
-        return f"scenario_{scenario_id}"
\ No newline at end of file
+        return f"scenario_{scenario_id}"
+
+    def is_env_flag_set(variable):
+        '''
+        Returns True if the environment variable `variable` is set to a value that turns on a flag, such as
+        "1", "true" or "yes" (case-insensitive). Returns False if the variable is unset or set to anything else.
+
+        Used to let callers switch on optional modes of the test harness without changing test code.
+
+        :param str variable: name of the environment variable to inspect.
+
+        :returns: whether the flag represented by `variable` is on
+        :rtype: bool
+        '''
+        value                                   = _os.environ.get(variable)
+        if value is None:
+            return False
+        return value.strip().lower() in ["1", "true", "yes", "on"]
+
+    def work_folder(purpose):
+        '''
+        Returns the folder where the test harness keeps generated content for the given `purpose`, such as
+        local bare repos or caches. Such content is not part of any scenario, so it is kept outside the
+        scenarios repo: under the folder given by the environment variable Chassis_TestStatics.WORK_FOLDER, 
+        if set, or otherwise under ``~/.cache/conway_test``.
+
+        :param str purpose: name of the subfolder for the content in question, e.g., "local_remotes"
+
+        :returns: absolute path to the folder for `purpose`. The folder is not created by this method.
+        :rtype: str
+        '''
+        root                                    = _os.environ.get(Chassis_TestStatics.WORK_FOLDER)
+        if root is None:
+            root                                = _os.path.expanduser("~/.cache/conway_test")
+        return f"{root}/{purpose}"
+
+    def exclude_from_git(repo_folder, relative_path):
+        '''
+        Makes GIT ignore `relative_path` in the GIT repo at `repo_folder` by listing it in the repo's
+        ``.git/info/exclude`` file, unless it is already listed there. Unlike ``.gitignore``, that file is local to
+        the clone, so this doesn't change the content of the repo.
+
+        Does nothing if `repo_folder` is not the root of a GIT repo with a ``.git`` folder (e.g., for worktrees).
+
+        :param str repo_folder: absolute path to the root of a GIT repo
+        :param str relative_path: path to ignore, relative to `repo_folder`, e.g., ".conway_test_trash"
+        '''
+        git_folder                              = f"{repo_folder}/.git"
+        if not _os.path.isdir(git_folder):
+            return
+        pattern                                 = f"/{relative_path}/"
+        exclude_path                            = f"{git_folder}/info/exclude"
+        if _os.path.exists(exclude_path):
+            with open(exclude_path) as file:
+                if pattern in file.read().splitlines():
+                    return
+        _os.makedirs(_os.path.dirname(exclude_path), exist_ok=True)
+        with open(exclude_path, "a") as file:
+            file.write(f"\n# Added by the Conway test harness\n{pattern}\n")